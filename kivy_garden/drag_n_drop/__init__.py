@@ -17,7 +17,10 @@ primary and one internal component used to have drag and drop:
 * Finally, :class:`DraggableController`which manages the drag and drop
   coordination. This is created automatically for each
   :class:`DraggableObjectBehavior.drag_controller` upon first drag, or it
-  can be set by the user to a global controller to save memory.
+  can be set by the user to a global controller to save memory. Setting
+  :attr:`DraggableObjectBehavior.use_default_controller` to True makes the
+  widgets share the controller returned by
+  :func:`get_default_drag_controller` instead.
 
 Layout
 -------
@@ -61,6 +64,85 @@ can be dragged into which layout using their
 :attr:`DraggableLayoutBehavior.drag_classes` for the widget to be draggable
 into the layout.
 
+Batched Drops
+--------------
+
+When :attr:`DraggableLayoutBehavior.batch_drop` is True, the layout doesn't
+need to implement :meth:`DraggableLayoutBehavior.handle_drag_release`. The
+drop is applied by :meth:`DraggableLayoutBehavior.apply_drop`, which removes
+the dropped widgets from their current parent, removes the spacer and
+inserts the widgets as a single batch. If a widget lands in the spacer's slot
+and has the same sizing hints, it simply takes the spacer's place, without a
+new layout pass. Drops that leave the children unchanged, e.g. when a widget
+that was never removed from the layout is dropped back at its own index,
+don't change the layout at all.
+
+Asynchronous Drops
+-------------------
+
+When dropping requires slow work, e.g. saving the new order to a database,
+:meth:`DraggableLayoutBehavior.handle_drag_release` can return a coroutine or
+a future rather than changing the layout. A placeholder is then shown where
+the widget was dropped while the work runs, on the running :mod:`asyncio`
+loop or in a worker thread, so the app keeps rendering. When it's done,
+:meth:`DraggableLayoutBehavior.commit_drop` replaces the placeholder with the
+widget, or if it failed, :meth:`DraggableLayoutBehavior.rollback_drop`
+returns the widget to where it was dragged from::
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            return executor.submit(save_order, drag_widget.text, index)
+
+Scrolling While Dragging
+-------------------------
+
+When a :class:`DraggableLayoutBehavior` is in a
+:class:`~kivy.uix.scrollview.ScrollView` and its
+:attr:`DraggableLayoutBehavior.drag_scroll_margin` is set, dragging within
+that margin of the edges of the :class:`~kivy.uix.scrollview.ScrollView`
+scrolls it, faster the closer the touch is to the edge. The scrolling is done
+once per frame, for as long as the touch stays in the margin, and the spacer is
+moved after each scroll step rather than on each touch event.
+
+Reordering a RecycleView
+-------------------------
+
+:class:`DraggableRecycleBoxLayoutBehavior` reorders the items of a
+:class:`~kivy.uix.recycleview.RecycleView` rather than the layout's children.
+The drop position is computed as an index into the ``data`` from the items'
+geometry, the spacer is drawn as a gap between the items and the drop moves
+the item in ``data``, so long lists stay cheap to drag in::
+
+    class DraggableRecycleBoxLayout(
+            DraggableRecycleBoxLayoutBehavior, RecycleBoxLayout):
+        pass
+
+    class DragLabel(DraggableObjectBehavior, Label):
+        # the view stays in the layout, only its data is moved on drop
+        pass
+
+Registering Layouts With the Controller
+-----------------------------------------
+
+By default, each :class:`DraggableLayoutBehavior` checks every touch that
+propagates through the widget tree to see whether it's a drag it accepts. When
+many layouts are used with a global :class:`DraggableController`, the layouts
+can instead set their :attr:`DraggableLayoutBehavior.drop_controller` to it.
+The controller then only hit tests the layouts accepting the dragged widget
+and dispatches the drag directly to the one under the touch.
+
+Registered layouts also get the ``on_drag_start`` and ``on_drag_end`` events
+of :class:`DraggableLayoutBehavior` for the drags they accept, e.g. to
+highlight the valid drop targets. Only the matching layouts are notified,
+rather than every layout binding to :attr:`DraggableController.dragging`::
+
+    DraggableBoxLayout:
+        drag_classes: ['label']
+        drop_controller: app.drag_controller
+        on_drag_start: self.drop_color = 1, 0, 1, .2
+        on_drag_end: self.drop_color = 0, 0, 0, 0
+
 Example
 --------
 
@@ -107,12 +189,29 @@ And then in kv::
                 text: 'A*'
                 drag_cls: 'label'
 """
+import asyncio
+import fnmatch
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import partial
+from math import ceil
+from operator import attrgetter, itemgetter
+from time import perf_counter
+from weakref import ref, WeakSet, WeakKeyDictionary
+
 from kivy.properties import ObjectProperty, NumericProperty, \
-    StringProperty, ListProperty, DictProperty, BooleanProperty, ColorProperty
+    StringProperty, ListProperty, DictProperty, BooleanProperty, \
+    ColorProperty, OptionProperty
 from kivy.factory import Factory
+from kivy.clock import Clock
+from kivy.logger import Logger
 from kivy.event import EventDispatcher
 from kivy.uix.widget import Widget
-from kivy.graphics import Fbo, ClearBuffers, ClearColor, Scale, Translate
+from kivy.uix.scrollview import ScrollView
+from kivy.graphics import Fbo, ClearBuffers, ClearColor, Scale, Translate, \
+    InstructionGroup, PushMatrix, PopMatrix, Callback
 from kivy.graphics.texture import Texture
 from kivy.lang.builder import Builder
 from kivy.core.window import Window
@@ -120,9 +219,10 @@ from kivy.config import Config
 
 __all__ = (
     'DraggableObjectBehavior', 'DraggableLayoutBehavior',
-    'DraggableController',
+    'DraggableController', 'DragSession', 'PreviewTexturePool', 'DragStats',
     'PreviewWidget', 'SpacerWidget', 'DraggableBoxLayoutBehavior',
-    'DraggableGridLayoutBehavior')
+    'DraggableGridLayoutBehavior', 'DraggableRecycleBoxLayoutBehavior',
+    'get_default_drag_controller')
 
 from kivy_garden.drag_n_drop._version import __version__
 
@@ -147,6 +247,88 @@ def collide_parent_tree(widget, x, y):
     return True
 
 
+_drop_executor = None
+
+
+def _get_running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:  # python < 3.7
+        return asyncio._get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _run_coroutine(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run_drop_work(work):
+    """Starts running ``work``, a coroutine or future returned by
+    :meth:`DraggableLayoutBehavior.handle_drag_release`, and returns a future
+    with its result.
+
+    A coroutine is scheduled on the running :mod:`asyncio` loop, e.g. when the
+    app is run with ``async_runTouchApp``, otherwise it is run in its own loop
+    in a worker thread. Futures are returned as is.
+    """
+    if isinstance(work, (Future, asyncio.Future)):
+        return work
+
+    loop = _get_running_loop()
+    if loop is not None:
+        return asyncio.ensure_future(work, loop=loop)
+
+    global _drop_executor
+    if _drop_executor is None:
+        _drop_executor = ThreadPoolExecutor(max_workers=1)
+    return _drop_executor.submit(_run_coroutine, work)
+
+
+def is_drop_work(result):
+    """Returns whether ``result``, as returned by
+    :meth:`DraggableLayoutBehavior.handle_drag_release`, is work that
+    completes the drop asynchronously, i.e. a coroutine or a future.
+    """
+    return isinstance(result, (Future, asyncio.Future)) or \
+        asyncio.iscoroutine(result)
+
+
+def is_drag_cls_pattern(drag_cls):
+    """Returns whether the name listed in
+    :attr:`DraggableLayoutBehavior.drag_classes` is a glob pattern, rather than
+    an exact :attr:`DraggableObjectBehavior.drag_cls`.
+    """
+    return any(c in drag_cls for c in '*?[')
+
+
+_drag_clip_props = (
+    'pos', 'size', 'parent', 'scroll_x', 'scroll_y', 'transform')
+
+
+def get_window_clip_rect(widget):
+    """Returns the ``(x, y, right, top)`` rectangle, in window coordinates, of
+    the area where the widget and all its parents overlap. I.e. the area where
+    :func:`collide_parent_tree` is True.
+    """
+    x, y = widget.to_window(*widget.pos)
+    right, top = widget.to_window(widget.right, widget.top)
+
+    parent = widget.parent
+    while parent and hasattr(parent, 'to_parent'):
+        px, py = parent.to_window(*parent.pos)
+        pright, ptop = parent.to_window(parent.right, parent.top)
+        x, y = max(x, px), max(y, py)
+        right, top = min(right, pright), min(top, ptop)
+
+        parent = parent.parent
+    return x, y, right, top
+
+
 class DraggableObjectBehavior(object):
     """A widget that inherits from this class can participate in a drag by
     someone dragging it with the mouse.
@@ -170,8 +352,30 @@ class DraggableObjectBehavior(object):
     will preview and allow the widget to be dropped there.
     """
 
+    use_default_controller = False
+    """Whether the widget uses the controller shared by the whole app, returned
+    by :func:`get_default_drag_controller`, when :attr:`drag_controller` is
+    still None on its first touch. Otherwise, each widget creates its own
+    :class:`DraggableController`.
+
+    It's a class attribute rather than a property, so it can be enabled for
+    all the draggable widgets with
+    ``DraggableObjectBehavior.use_default_controller = True``, or for a
+    single class of widgets.
+    """
+
     _drag_touch = None
 
+    def _get_drag_controller(self):
+        controller = self.drag_controller
+        if not controller:
+            if self.use_default_controller:
+                controller = get_default_drag_controller()
+            else:
+                controller = DraggableController()
+            self.drag_controller = controller
+        return controller
+
     def initiate_drag(self):
         """Called by the :class:`DraggableController`, when a drag is initiated
         on the widget (i.e. thw widget is actually being dragged once it
@@ -210,10 +414,7 @@ class DraggableObjectBehavior(object):
         touch.grab(self)
         touch.ud[uid] = True
 
-        if not self.drag_controller:
-            self.drag_controller = DraggableController()
-
-        return self.drag_controller.drag_down(self, touch)
+        return self._get_drag_controller().drag_down(self, touch)
 
     def on_touch_move(self, touch):
         uid = self._touch_uid()
@@ -227,10 +428,7 @@ class DraggableObjectBehavior(object):
         if touch.grab_current is not self:
             return False
 
-        if not self.drag_controller:
-            self.drag_controller = DraggableController()
-
-        return self.drag_controller.drag_move(self, touch)
+        return self._get_drag_controller().drag_move(self, touch)
 
     def on_touch_up(self, touch):
         uid = self._touch_uid()
@@ -247,10 +445,7 @@ class DraggableObjectBehavior(object):
         touch.ungrab(self)
         self._drag_touch = None
 
-        if not self.drag_controller:
-            self.drag_controller = DraggableController()
-
-        return self.drag_controller.drag_up(self, touch)
+        return self._get_drag_controller().drag_up(self, touch)
 
 
 class PreviewWidget(Widget):
@@ -258,10 +453,62 @@ class PreviewWidget(Widget):
     drag. Used internally.
     """
 
-    preview_texture = ObjectProperty(None)
+    preview_texture = ObjectProperty(None, allownone=True)
     """The texture that is previewed when a widget is being dragged.
     """
 
+    live_widgets = ListProperty([])
+    """The widgets whose canvas is drawn as is by the preview, rather than
+    :attr:`preview_texture`, when :attr:`DraggableController.preview_mode` is
+    ``'live'``.
+    """
+
+    live_origin = ListProperty([0, 0])
+    """The window position of the bottom left corner of :attr:`live_widgets`,
+    which is drawn at the preview's ``pos``.
+    """
+
+    live_background_color = ColorProperty((0, 0, 0, 0))
+    """The color drawn behind :attr:`live_widgets`.
+    """
+
+    _live_group = None
+
+    _live_translate = None
+
+    def __init__(self, **kwargs):
+        super(PreviewWidget, self).__init__(**kwargs)
+        self._live_group = InstructionGroup()
+        self._live_translate = Translate()
+        self.canvas.add(self._live_group)
+        self.fbind('pos', self._update_live_translate)
+        self.fbind('live_origin', self._update_live_translate)
+        self.fbind('live_widgets', self._update_live_group)
+
+    def _update_live_translate(self, *largs):
+        self._live_translate.xy = (
+            self.x - self.live_origin[0], self.y - self.live_origin[1])
+
+    def _update_live_group(self, *largs):
+        group = self._live_group
+        group.clear()
+        if not self.live_widgets:
+            return
+
+        group.add(PushMatrix())
+        group.add(self._live_translate)
+        for widget in self.live_widgets:
+            # the widget's canvas is drawn from where it is, so it stays in
+            # its parent's canvas and keeps animating
+            group.add(PushMatrix())
+            group.add(Translate(*widget.to_window(0, 0)))
+            group.add(Callback(partial(self._draw_live_widget, widget)))
+            group.add(PopMatrix())
+        group.add(PopMatrix())
+
+    def _draw_live_widget(self, widget, *largs):
+        widget.canvas.draw()
+
 
 class SpacerWidget(Widget):
     """Widget inserted at the location where the dragged widget may be
@@ -274,7 +521,8 @@ Builder.load_string('''
 <PreviewWidget>:
     canvas:
         Color:
-            rgba: 1, 1, 1, 1
+            rgba: \
+(1, 1, 1, 1) if self.preview_texture else self.live_background_color
         Rectangle:
             size: self.size
             pos: self.pos
@@ -290,320 +538,2173 @@ Builder.load_string('''
 ''')
 
 
-class DraggableController(EventDispatcher):
-    """The controller that manages the dragging process.
+class _PreviewBuffer(object):
+    """A :class:`~kivy.graphics.Fbo` into which the preview is rendered and,
+    optionally, a :class:`~kivy.graphics.texture.Texture` holding a copy of the
+    rendered pixels. Used internally by :class:`PreviewTexturePool`.
     """
 
-    drag_distance = NumericProperty(_drag_distance)
-    """Minimum amount of pixel distance a widget needs to be dragged before
-    we start going into drag mode.
-    """
+    def __init__(self, size):
+        super(_PreviewBuffer, self).__init__()
+        self.size = size
+        self.nbytes = 4 * size[0] * size[1]
+        self.pixels = None
+        self.source = None
+        self.origin = 0, 0
+        self.texture = None
+        self.in_use = False
+        self.cached = False
+
+        self.fbo = fbo = Fbo(size=size, with_stencilbuffer=False)
+        with fbo:
+            self.clear_color = ClearColor(0, 0, 0, 1)
+            ClearBuffers()
+            self.scale = Scale(1, 1, 1)
+            self.translate = Translate(0, 0, 0)
+        fbo.add_reload_observer(self.reload_fbo)
 
-    preview_widget = None
-    """The widget shown as preview during a drag, which follows the current
-    mouse position. Defaults to a :class:`PreviewWidget`.
-    that f"""
+    def create_texture(self):
+        """Creates the texture used to hold a copy of the pixels, if it
+        doesn't exist yet, and returns the number of bytes added.
+        """
+        if self.texture is not None:
+            return 0
+
+        self.texture = Texture.create(
+            size=self.size, colorfmt='rgba', bufferfmt='ubyte')
+        self.texture.add_reload_observer(self.reload_texture)
+        nbytes = 4 * self.size[0] * self.size[1]
+        self.nbytes += nbytes
+        return nbytes
+
+    def reload_texture(self, texture):
+        if self.pixels:
+            texture.blit_buffer(
+                self.pixels, colorfmt='rgba', bufferfmt='ubyte')
 
-    preview_pixels = None
+    def reload_fbo(self, fbo):
+        if self.source is None or self.pixels:
+            return
 
-    widget_dragged = ObjectProperty(None, rebind=True, allownone=True)
-    """The :class:`DraggableObjectBehavior` widget currently being dragged by
-    the controller.
-    """
+        try:
+            if isinstance(self.source, list):
+                self.render_group(self.source, self.origin)
+            else:
+                self.render(self.source)
+        except ReferenceError:
+            self.source = None
 
-    touch_dx = 0
+    def render(self, source_widget, background_color=None, scale=None):
+        """Renders the widget into the fbo, scaled by ``scale``.
+        """
+        if background_color is not None:
+            self.clear_color.rgba = background_color
+        if scale is not None:
+            self.scale.xyz = scale, scale, 1
+        self.translate.xy = -source_widget.x, -source_widget.y
 
-    touch_dy = 0
+        # get the pixels from the source widget
+        parent = source_widget.parent
+        if parent is not None:
+            canvas_parent_index = parent.canvas.indexof(source_widget.canvas)
+            if canvas_parent_index > -1:
+                parent.canvas.remove(source_widget.canvas)
 
-    dragging = BooleanProperty(False)
-    """Whether the controller is currently dragging something.
-    """
+        fbo = self.fbo
+        fbo.add(source_widget.canvas)
+        fbo.draw()
+        fbo.remove(source_widget.canvas)
 
-    start_widget_pos = 0, 0
+        if parent is not None and canvas_parent_index > -1:
+            parent.canvas.insert(canvas_parent_index, source_widget.canvas)
 
-    preview_background_color = ColorProperty((0, 0, 0, 1))
-    """The background color of the preview widget as it's dragged. 
+    def render_group(
+            self, widgets, origin, background_color=None, scale=None):
+        """Renders all the widgets into the fbo in a single pass, scaled by
+        ``scale``. Each widget is drawn at its window position, relative to
+        ``origin``, the window position of the fbo's bottom left corner.
+        """
+        if background_color is not None:
+            self.clear_color.rgba = background_color
+        if scale is not None:
+            self.scale.xyz = scale, scale, 1
+        self.translate.xy = -origin[0], -origin[1]
+
+        fbo = self.fbo
+        removed = []
+        for widget in widgets:
+            parent = widget.parent
+            index = -1
+            if parent is not None:
+                index = parent.canvas.indexof(widget.canvas)
+                if index > -1:
+                    parent.canvas.remove(widget.canvas)
+
+            group = InstructionGroup()
+            group.add(PushMatrix())
+            group.add(Translate(*widget.to_window(0, 0)))
+            group.add(widget.canvas)
+            group.add(PopMatrix())
+            fbo.add(group)
+            removed.append((widget, parent, index, group))
 
-    Defaults to ``rgba=0,0,0,1``, which means the dragging widget will be
-    placed on a black background. To make the background transparent, set it
-    to ``(0, 0, 0, 0)``.
+        fbo.draw()
+
+        # put the canvases back in the reverse order they were removed, so the
+        # indices of siblings are still valid
+        for widget, parent, index, group in reversed(removed):
+            fbo.remove(group)
+            group.remove(widget.canvas)
+            if parent is not None and index > -1:
+                parent.canvas.insert(index, widget.canvas)
+
+
+class PreviewTexturePool(object):
+    """A pool of the :class:`~kivy.graphics.Fbo` and
+    :class:`~kivy.graphics.texture.Texture` pairs used by
+    :class:`DraggableController` to render the drag previews, so they don't
+    have to be re-created for every drag.
+
+    Buffers are grouped by their size, rounded up to a multiple of
+    :attr:`bucket_size`. Buffers that are not in use are kept until the memory
+    of all the buffers exceeds :attr:`max_bytes`, at which point the least
+    recently used ones are released.
     """
 
-    def __init__(self, **kwargs):
-        super(DraggableController, self).__init__(**kwargs)
-        self.preview_widget = PreviewWidget(size_hint=(None, None))
+    max_bytes = 0
+    """The maximum number of bytes held by the buffers of the pool.
+    """
 
-    def _reload_texture(self, texture):
-        if self.preview_pixels:
-            texture.blit_buffer(
-                self.preview_pixels, colorfmt='rgba', bufferfmt='ubyte')
-        else:
-            texture.remove_reload_observer(self._reload_texture)
+    bucket_size = 64
+    """The granularity, in pixels, to which the requested sizes are rounded up.
+    """
 
-    def prepare_preview_widget(self, source_widget):
-        size = source_widget.size
-        widget = self.preview_widget
+    total_bytes = 0
+    """The number of bytes currently held by the buffers of the pool, whether
+    in use or not.
+    """
 
-        # get the pixels from the source widget
-        if source_widget.parent is not None:
-            canvas_parent_index = source_widget.parent.canvas.indexof(
-                source_widget.canvas)
-            if canvas_parent_index > -1:
-                source_widget.parent.canvas.remove(source_widget.canvas)
+    hits = 0
+    """The number of times a buffer was reused from the pool.
+    """
 
-        fbo = Fbo(size=size, with_stencilbuffer=False)
+    misses = 0
+    """The number of times a new buffer had to be created.
+    """
 
-        with fbo:
-            ClearColor(*self.preview_background_color)
-            ClearBuffers()
-            Scale(1, -1, 1)
-            Translate(
-                -source_widget.x, -source_widget.y - source_widget.height, 0)
+    evictions = 0
+    """The number of unused buffers released because the pool was full.
+    """
 
-        fbo.add(source_widget.canvas)
-        fbo.draw()
-        self.preview_pixels = fbo.texture.pixels
-        fbo.remove(source_widget.canvas)
+    def __init__(self, max_bytes=32 * 1024 * 1024, bucket_size=64):
+        super(PreviewTexturePool, self).__init__()
+        self.max_bytes = max_bytes
+        self.bucket_size = bucket_size
+        self._free = {}
+        self._lru = OrderedDict()
 
-        if source_widget.parent is not None and canvas_parent_index > -1:
-            source_widget.parent.canvas.insert(
-                canvas_parent_index, source_widget.canvas)
+    def get_bucket(self, size):
+        """Returns the size of the buffer that will be used for a preview of
+        the given size.
+        """
+        b = max(int(self.bucket_size), 1)
+        return tuple(max(int(ceil(v / b)), 1) * b for v in size)
 
-        widget.size = size
-        texture = widget.preview_texture = Texture.create(
-            size=size, colorfmt='RGBA', bufferfmt='ubyte')
-        texture.flip_vertical()
-        texture.add_reload_observer(self._reload_texture)
-        self._reload_texture(texture)
+    def acquire(self, size, with_texture=True):
+        """Returns a buffer, at least as large as ``size``, that can be used
+        until it is given back with :meth:`release`.
 
-    def clean_dragging(self):
-        """Removes the drag widget preview.
+        If ``with_texture``, the buffer also has a texture into which the
+        rendered pixels can be copied.
         """
-        if not self.preview_pixels:
-            return
+        bucket = self.get_bucket(size)
+        free = self._free.get(bucket)
+        if free:
+            buffer = free.pop()
+            del self._lru[buffer]
+            self.hits += 1
+        else:
+            self.misses += 1
+            buffer = _PreviewBuffer(bucket)
+            self.total_bytes += buffer.nbytes
 
-        self.preview_pixels = None
-        widget = self.preview_widget
-        if widget.parent:
-            widget.parent.remove_widget(widget)
+        if with_texture:
+            self.total_bytes += buffer.create_texture()
+        self.trim()
+        return buffer
 
-    def drag_down(self, source, touch):
-        """Called by :class:`DraggableObjectBehavior` when it got a touch down.
+    def release(self, buffer):
+        """Gives a buffer acquired with :meth:`acquire` back to the pool.
         """
-        self.clean_dragging()
-        self.widget_dragged = source
-        self.prepare_preview_widget(source.drag_widget or source)
-        self.touch_dx = self.touch_dy = 0
-        self.dragging = False
-        self.preview_widget.canvas.opacity = 0
-        Window.add_widget(self.preview_widget)
-        self.start_widget_pos = self.preview_widget.pos = \
-            source.to_window(*source.pos)
-        return False
+        buffer.pixels = None
+        if buffer.nbytes > self.max_bytes:
+            self.total_bytes -= buffer.nbytes
+            return
 
-    def drag_move(self, source, touch):
-        """Called by :class:`DraggableObjectBehavior` when it got a touch move.
+        self._free.setdefault(buffer.size, []).append(buffer)
+        self._lru[buffer] = None
+        self.trim()
+
+    def trim(self):
+        """Releases the least recently used unused buffers until the pool is
+        within :attr:`max_bytes`.
         """
-        if not self.dragging:
-            self.touch_dx += abs(touch.dx)
-            self.touch_dy += abs(touch.dy)
-            if (self.touch_dx ** 2 + self.touch_dy ** 2) ** .5 \
-                    > self.drag_distance:
-                self.dragging = True
-                self.preview_widget.canvas.opacity = .4
-                touch.ud['drag_cls'] = source.drag_cls
-                touch.ud['drag_widget'] = source
-                source.initiate_drag()
-            else:
-                return False
+        lru = self._lru
+        while lru and self.total_bytes > self.max_bytes:
+            buffer, _ = lru.popitem(last=False)
+            self._free[buffer.size].remove(buffer)
+            self.total_bytes -= buffer.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """Releases all the unused buffers.
+        """
+        self.total_bytes -= sum(buffer.nbytes for buffer in self._lru)
+        self._free = {}
+        self._lru = OrderedDict()
 
-        x, y = self.start_widget_pos
-        x += touch.x - touch.ox
-        y += touch.y - touch.oy
-        self.preview_widget.pos = x, y
-        return False
 
-    def drag_up(self, source, touch):
-        """Called by :class:`DraggableObjectBehavior` when it got a touch up.
-        """
-        self.clean_dragging()
-        if not self.dragging:
-            return False
+class DragStats(object):
+    """Timings and counts of what a :class:`DraggableController` did during one
+    or more drags, collected when :attr:`DraggableController.collect_stats` is
+    True.
 
-        self.clean_dragging()
-        self.dragging = False
-        source.complete_drag()
-        self.widget_dragged = None
-        return False
+    All the times are in seconds, as measured with :func:`time.perf_counter`.
+    """
 
+    drags = 0
+    """The number of drags included in the stats.
+    """
 
-class DraggableLayoutBehavior(object):
-    """Adds support to a layout such that we can drag widgets **into** this
-    layout and preview it while dragging.
+    capture_count = 0
+    """The number of times the dragged widget was rendered into the preview.
+    """
 
-    Only :class:`DraggableObjectBehavior` widgets whose
-    :attr:`DraggableObjectBehavior.drag_cls` are in :attr:`drag_classes` will be
-    dropable into the layout.
+    capture_time = 0
+    """The time spent in :meth:`DraggableController.prepare_preview_widget`.
     """
 
-    spacer_props = DictProperty({})
-    """The properties of :attr:`spacer_widget`, which will be set according to
-    this dict. This enables setting the sizing info for the preview widget in
-    the layout.
+    move_count = 0
+    """The number of touch moves processed by the controller during the drags.
+    With :attr:`DraggableController.coalesce_moves`, it's the number of
+    processed batches of moves.
     """
 
-    spacer_widget = ObjectProperty(None)
-    """The widget that is added to the layout to show where the dragged widget
-    could be dropped.
+    move_time = 0
+    """The time spent by the controller processing the moves, i.e. moving the
+    preview widget and, for layouts registered with the controller, finding
+    the layout under the touch and updating its spacer.
+    """
 
-    Defaults to :class:`SpacerWidget` if not set.
+    max_move_time = 0
+    """The longest time spent processing a single move.
     """
 
-    drag_classes = ListProperty([])
-    """During a drag, the controller will try to preview and add the dragged
-    :class:`DraggableObjectBehavior` to this layout widget when it is over the
-    widget's area. But, it will only do it if the dragged widget's
-    :attr:`DraggableObjectBehavior.drag_cls` is in the layout's
-    :attr:`drag_classes`.
+    layouts_visited = 0
+    """The number of times a :class:`DraggableLayoutBehavior` was tested for
+    whether a move was over it, summed over all the moves.
+    """
 
-    This allows selecting which widgets can be dropped where.
+    layout_move_time = 0
+    """The time spent by the :class:`DraggableLayoutBehavior` under the touch
+    finding where the dragged widget would go and moving the spacer there.
+    For layouts registered with the controller, this is included in
+    :attr:`move_time`.
     """
 
-    drag_append_end = BooleanProperty(False)
-    """Whether the :class:`DraggableObjectBehavior` when dragged over the
-    layout's area should be previewed and return an index that would add it at
-    that location in its children, or if it will only support adding the widget
-    to the end of children.
+    spacer_moves = 0
+    """The number of times a spacer was added to a layout or moved within it.
     """
 
-    def __init__(self, **kwargs):
-        super(DraggableLayoutBehavior, self).__init__(**kwargs)
-        if self.spacer_widget is None:
-            self.spacer_widget = SpacerWidget()
-        self.fbind('spacer_props', self._track_spacer_props)
-        self._track_spacer_props()
+    initiate_drag_time = 0
+    """The time spent in :meth:`DraggableObjectBehavior.initiate_drag`.
+    """
 
-    def _track_spacer_props(self, *largs):
-        for key, value in self.spacer_props.items():
-            setattr(self.spacer_widget, key, value)
+    complete_drag_time = 0
+    """The time spent in :meth:`DraggableObjectBehavior.complete_drag`.
+    """
 
-    def _touch_uid(self):
-        return '{}.{}'.format(self.__class__.__name__, self.uid)
+    drag_release_time = 0
+    """The time spent in :meth:`DraggableLayoutBehavior.handle_drag_release`.
+    """
 
-    def compare_pos_to_widget(self, widget, pos):
-        """After we call :meth:`get_widget_under_drag` to find the widget in
-        ``children`` that is currently under the given pos (the current mouse
-        pos that drags a widget), we call this to find whether the mouse pos
-        indicates that the dragged widget needs to be added before or after
-        the widget returned by :meth:`get_widget_under_drag`.
+    _fields = (
+        'drags', 'capture_count', 'capture_time', 'move_count', 'move_time',
+        'layouts_visited', 'layout_move_time', 'spacer_moves',
+        'initiate_drag_time', 'complete_drag_time', 'drag_release_time')
 
-        It must return either the string `"before"`, or `"after"`.
+    def add(self, stats):
+        """Adds the values of another :class:`DragStats` to this one.
+        """
+        for name in self._fields:
+            setattr(self, name, getattr(self, name) + getattr(stats, name))
+        self.max_move_time = max(self.max_move_time, stats.max_move_time)
 
-        See :meth:`get_drop_insertion_index_move` and
-        :meth:`get_drop_insertion_index_up`.
+    def record_move(self, duration):
+        """Records a processed move that took ``duration`` seconds.
         """
-        return 'before'
+        self.move_count += 1
+        self.move_time += duration
+        if duration > self.max_move_time:
+            self.max_move_time = duration
 
-    def get_widget_under_drag(self, x, y):
-        """Returns the widget in children that is under the given position
-        (current mouse pos that drags the widget).
+    def reset(self):
+        """Resets all the values to zero.
+        """
+        for name in self._fields + ('max_move_time', ):
+            setattr(self, name, 0)
 
-        See :meth:`get_drop_insertion_index_move` and
-        :meth:`get_drop_insertion_index_up`.
+    def as_dict(self):
+        """Returns the values as a dict, e.g. to be sent as telemetry.
         """
-        for widget in self.children:
-            if widget.collide_point(x, y):
-                return widget
-        return None
+        return {
+            name: getattr(self, name)
+            for name in self._fields + ('max_move_time', )}
 
-    def handle_drag_release(self, index, drag_widget):
-        """This is called when a widget is dropped in the layout.
-        ``index`` is the index in `children` where the widget should be added.
-        ``drag_widget`` is the :class:`DraggableObjectBehavior` that was dropped
-        there.
 
-        This must be overwritten by the inherited class to actually do the
-        ``add_widget`` or something else.
-        """
-        pass
+class DragSession(object):
+    """The state of a single drag, i.e. of a touch that went down on a
+    :class:`DraggableObjectBehavior`, as managed by its
+    :class:`DraggableController`.
 
-    def get_drop_insertion_index_move(self, x, y):
-        """During a drag, it is called with when we need to figure out where
-        to display the spacer widget in the layout.
+    The controller keeps a session for each of the touches currently down on
+    its widgets, in :attr:`DraggableController.sessions`, so a single
+    controller can manage many simultaneous drags.
+    """
 
-        It calls :meth:`get_widget_under_drag` to find the widget in the layout
-        currently under the mouse pos. Then it uses
-        :meth:`compare_pos_to_widget` to figure out if it should be added
-        before, or after that widget and returns the index in ``children``
-        where the spacer should be added to represent the potential drop.
+    touch = None
+    """The touch doing the drag, or None for the session used when a preview
+    is prepared outside of a drag.
+    """
 
-        If the spacer is under the current pos, or if no widget is under it
-        (:meth:`get_widget_under_drag` returned ``None``), we return None,
-        otherwise the index.
-        """
-        spacer = self.spacer_widget
-        widget = self.get_widget_under_drag(x, y)
-        if widget == spacer:
-            return None
+    widget_dragged = None
+    """The :class:`DraggableObjectBehavior` widget being dragged.
+    """
 
-        if widget is None:
-            if spacer.parent:
-                self.remove_widget(spacer)
-            self.add_widget(spacer)
-            return None
+    widgets_dragged = None
+    """When :attr:`widget_dragged` is part of
+    :attr:`DraggableController.selection`, the list of all the selected
+    widgets, which are dragged together. Otherwise None.
+    """
 
-        i = self.children.index(widget)
-        j = None
-        if self.compare_pos_to_widget(widget, (x, y)) == 'before':
-            if i == len(self.children) - 1 or self.children[i + 1] != spacer:
-                j = i + 1
-        else:
-            if not i or self.children[i - 1] != spacer:
-                j = i
-        return j
+    dragging = False
+    """Whether the touch moved far enough to actually be dragging the widget.
+    """
 
-    def get_drop_insertion_index_up(self, x, y):
-        """When dropping a drag, it is called to get the index in children of
-        the layout where the widget was dropped and where it needs to be
-        inserted.
+    touch_dx = 0
 
-        It calls :meth:`get_widget_under_drag` to find the widget in the layout
-        currently under the mouse pos. Then it uses
-        :meth:`compare_pos_to_widget` to figure out if it should be added
-        before, or after that widget and returns the index in ``children``
-        where the it should be added to complete the drop.
+    touch_dy = 0
+
+    start_widget_pos = 0, 0
+
+    preview_widget = None
+    """The :class:`PreviewWidget` of this drag, taken from the controller's
+    pool of preview widgets.
+    """
+
+    preview_pixels = None
+    """The pixels of the rendered preview, when
+    :attr:`DraggableController.preview_mode` is ``'pixels'``.
+    """
+
+    drag_stats = None
+    """The :class:`DragStats` of this drag when
+    :attr:`DraggableController.collect_stats` is True, otherwise None.
+    """
+
+    drag_origins = None
+    """The list of ``(widget, parent, index)`` of each dragged widget, where
+    ``parent`` and ``index`` are the widget's parent and its index in the
+    parent's ``children`` when the drag started, before
+    :meth:`DraggableObjectBehavior.initiate_drag` was called. ``parent`` is
+    None for widgets that had no parent. Set when the drag starts.
+    """
+
+    _preview_buffer = None
+
+    _pending_move = None
+
+    _drop_targets_snapshot = None
+
+    _drop_target = None
+
+    def __init__(self, touch=None, widget_dragged=None, widgets_dragged=None):
+        super(DragSession, self).__init__()
+        self.touch = touch
+        self.widget_dragged = widget_dragged
+        self.widgets_dragged = widgets_dragged
+
+
+class DraggableController(EventDispatcher):
+    """The controller that manages the dragging process.
+
+    A single controller can manage any number of simultaneous drags, e.g. by
+    different fingers. The state of each drag is kept in its own
+    :class:`DragSession`, in :attr:`sessions`. The attributes of the
+    controller describing a drag, such as :attr:`widget_dragged` and
+    :attr:`preview_widget`, reflect the most recently started drag.
+
+    A :class:`DraggableLayoutBehavior` however has a single
+    :attr:`~DraggableLayoutBehavior.spacer_widget` and keeps the state of
+    only one drag at a time. Simultaneous drags over the same layout are not
+    supported, the spacer then follows whichever of them moved last.
+    """
+
+    drag_distance = NumericProperty(_drag_distance)
+    """Minimum amount of pixel distance a widget needs to be dragged before
+    we start going into drag mode.
+    """
+
+    preview_pixels = None
+    """The pixels of the rendered :attr:`preview_widget`, when
+    :attr:`preview_mode` is ``'pixels'``.
+    """
+
+    widget_dragged = ObjectProperty(None, rebind=True, allownone=True)
+    """The :class:`DraggableObjectBehavior` widget currently being dragged by
+    the controller. With multiple simultaneous drags, it's the widget of the
+    most recently started one.
+    """
+
+    dragging = BooleanProperty(False)
+    """Whether the controller is currently dragging something.
+    """
+
+    selection = ListProperty([])
+    """A list of :class:`DraggableObjectBehavior` widgets that are dragged
+    together when a drag starts on any of them.
+
+    The widgets are rendered into a single preview, in one pass, and dropped
+    together with a single call to
+    :meth:`DraggableLayoutBehavior.handle_drag_release_multiple`. Whether the
+    layout accepts them is decided by the
+    :attr:`DraggableObjectBehavior.drag_cls` of the widget under the touch.
+    """
+
+    sessions = {}
+    """A dict mapping the :attr:`~kivy.input.MotionEvent.uid` of each touch
+    currently down on a widget of the controller to its :class:`DragSession`.
+    """
+
+    preview_background_color = ColorProperty((0, 0, 0, 1))
+    """The background color of the preview widget as it's dragged. 
+
+    Defaults to ``rgba=0,0,0,1``, which means the dragging widget will be
+    placed on a black background. To make the background transparent, set it
+    to ``(0, 0, 0, 0)``.
+    """
+
+    lazy_preview_capture = BooleanProperty(False)
+    """Whether the preview of the dragged widget is only captured once the
+    touch actually becomes a drag.
+
+    If False (the default), the widget is rendered into the preview on every
+    touch down, even if the touch turns out to be a simple click. If True, the
+    preview is only rendered in :meth:`drag_move`, once the touch moved more
+    than :attr:`drag_distance`, so clicks don't pay the cost of the capture.
+    """
+
+    preview_mode = OptionProperty(
+        'pixels', options=['pixels', 'texture', 'live'])
+    """How the rendered preview is kept during the drag.
+
+    If ``'pixels'`` (the default), the rendered pixels are read back from the
+    GPU into :attr:`preview_pixels` and copied into a texture, from which they
+    are restored if the GL context is lost.
+
+    If ``'texture'``, the preview is drawn directly from the texture of the
+    :class:`~kivy.graphics.Fbo` it was rendered into, skipping the pixel
+    readback. If the GL context is lost, the preview is rendered again from
+    the dragged widget.
+
+    If ``'live'``, nothing is rendered up front. The preview draws the
+    dragged widget's own canvas instructions, translated to the preview's
+    position, so there's no capture cost and the preview follows any change
+    to the widget, e.g. an animation. Each frame then draws the widget twice,
+    so it suits small widgets that are cheap to draw, like labels. It assumes
+    the widget's parents only translate it, and :attr:`preview_scale` doesn't
+    apply.
+    """
+
+    preview_scale = NumericProperty(1.)
+    """The factor by which the preview is scaled down when it's rendered.
+
+    The preview is still displayed at the size of the dragged widget, but
+    rendering it at a lower resolution makes the capture cheaper for large
+    widgets.
+
+    Defaults to ``1``, the widget's native resolution.
+    """
+
+    preview_max_pixels = NumericProperty(0)
+    """If non-zero, the maximum number of pixels (width times height) at which
+    the preview is rendered. Larger widgets are scaled down further than
+    :attr:`preview_scale` to fit, which bounds the cost of the capture
+    regardless of the widget's size.
+    """
+
+    preview_pool = None
+    """The :class:`PreviewTexturePool` from which the buffers used to render
+    the preview are taken. It can be inspected to tune
+    :attr:`preview_pool_max_bytes`.
+    """
+
+    preview_pool_max_bytes = NumericProperty(32 * 1024 * 1024)
+    """The maximum number of bytes of GPU memory that may be held by
+    :attr:`preview_pool`, after which the least recently used unused buffers
+    are released.
+
+    Defaults to 32MB.
+    """
+
+    preview_pool_bucket_size = NumericProperty(64)
+    """The granularity, in pixels, to which the preview size is rounded up when
+    looking for a buffer in the :attr:`preview_pool`.
+    """
+
+    preview_cache = BooleanProperty(False)
+    """Whether the rendered preview of each dragged widget is cached and
+    reused when the same widget is dragged again.
+
+    A cached preview is dropped when the widget's size changes, or when
+    :meth:`invalidate_preview` is called for it, which the app must do when
+    the widget's appearance changed.
+    """
+
+    preview_cache_max_bytes = NumericProperty(16 * 1024 * 1024)
+    """The maximum number of bytes used by the previews cached when
+    :attr:`preview_cache` is True, after which the least recently used
+    previews are dropped.
+
+    Defaults to 16MB.
+    """
+
+    preview_cache_hits = 0
+    """The number of drags whose preview was taken from the cache.
+    """
+
+    _drop_targets = None
+
+    _pattern_drop_targets = None
+
+    coalesce_moves = BooleanProperty(False)
+    """Whether the processing of touch moves during a drag is deferred to the
+    next frame, so that it happens at most once per frame.
+
+    When True, moving the preview widget and computing where the spacer goes
+    in the :class:`DraggableLayoutBehavior` under the touch is only done for
+    the last touch position before each frame, rather than for every move
+    event. This helps with input devices that send many events per frame.
+    The final drop is always computed from the exact touch up position.
+    """
+
+    collect_stats = BooleanProperty(False)
+    """Whether the controller times what happens during each drag.
+
+    When True, a :class:`DragStats` is filled in for each drag as
+    :attr:`drag_stats`. When the drag ends, it's added to :attr:`stats` and
+    the ``on_drag_stats`` event is dispatched with it.
+    """
+
+    stats = None
+    """The :class:`DragStats` summed over all the drags since
+    :attr:`collect_stats` was enabled, or since it was last reset with
+    :meth:`DragStats.reset`.
+    """
+
+    drag_stats = None
+    """The :class:`DragStats` of the most recent drag in progress when
+    :attr:`collect_stats` is True, otherwise None.
+    """
+
+    __events__ = ('on_drag_stats', )
+
+    _preview_widget = None
+
+    _preview_widgets = []
+
+    _default_session = None
+
+    _current_session = None
+
+    _finished_stats = []
+
+    _trigger_stats = None
+
+    _trigger_move = None
+
+    _preview_cache = None
+
+    _preview_cache_bytes = 0
+
+    def __init__(self, **kwargs):
+        super(DraggableController, self).__init__(**kwargs)
+        self._preview_widgets = []
+        self.sessions = {}
+        self.preview_pool = PreviewTexturePool(
+            max_bytes=self.preview_pool_max_bytes,
+            bucket_size=self.preview_pool_bucket_size)
+        self.fbind('preview_pool_max_bytes', self._update_preview_pool)
+        self.fbind('preview_pool_bucket_size', self._update_preview_pool)
+        self._preview_cache = OrderedDict()
+        self.fbind('preview_cache', self._trim_preview_cache)
+        self.fbind('preview_cache_max_bytes', self._trim_preview_cache)
+        self._trigger_move = Clock.create_trigger(
+            self._process_pending_move, -1)
+        self._drop_targets = {}
+        self._pattern_drop_targets = WeakSet()
+        self.stats = DragStats()
+        self._finished_stats = []
+        self._trigger_stats = Clock.create_trigger(
+            self._dispatch_drag_stats, -1)
+
+    @property
+    def preview_widget(self):
+        """The widget shown as preview during the most recent drag, which
+        follows the current mouse position. It's a :class:`PreviewWidget` taken
+        from a pool of preview widgets, from which each :class:`DragSession`
+        gets its own.
+
+        The preview widgets are only created once they are needed, so a
+        controller that never dragged anything doesn't hold any.
+        """
+        widget = self._preview_widget
+        if widget is None:
+            widget = self._preview_widget = PreviewWidget(
+                size_hint=(None, None))
+            self._preview_widgets.append(widget)
+        return widget
+
+    @preview_widget.setter
+    def preview_widget(self, widget):
+        self._preview_widget = widget
+
+    def _get_latest_session(self):
+        # the session of the hook being called, else the most recent drag
+        if self._current_session is not None:
+            return self._current_session
+        if self.sessions:
+            return list(self.sessions.values())[-1]
+        return self._get_default_session()
+
+    @property
+    def touch_dx(self):
+        """The :attr:`DragSession.touch_dx` of the most recently started drag,
+        or of the drag whose hook, e.g. :meth:`prepare_preview_widget`, is
+        being called. Setting it sets it in that session.
+        """
+        return self._get_latest_session().touch_dx
+
+    @touch_dx.setter
+    def touch_dx(self, value):
+        self._get_latest_session().touch_dx = value
+
+    @property
+    def touch_dy(self):
+        """Like :attr:`touch_dx`, but for :attr:`DragSession.touch_dy`.
+        """
+        return self._get_latest_session().touch_dy
+
+    @touch_dy.setter
+    def touch_dy(self, value):
+        self._get_latest_session().touch_dy = value
+
+    @property
+    def start_widget_pos(self):
+        """Like :attr:`touch_dx`, but for :attr:`DragSession.start_widget_pos`.
+        """
+        return self._get_latest_session().start_widget_pos
+
+    @start_widget_pos.setter
+    def start_widget_pos(self, value):
+        self._get_latest_session().start_widget_pos = value
+
+    def _call_with_session(self, session, method, *largs):
+        # the hooks are called without the session, so overwrites written
+        # before there were sessions keep working
+        previous = self._current_session
+        self._current_session = session
+        try:
+            return method(*largs)
+        finally:
+            self._current_session = previous
+
+    def on_drag_stats(self, stats):
+        """Dispatched with the :class:`DragStats` of a drag once it ended, when
+        :attr:`collect_stats` is True.
+
+        It's dispatched before the next frame, after the touch up was
+        dispatched to all the widgets, so it includes the drop in the layout.
+        """
+        pass
+
+    def _finish_drag_stats(self, session, completed):
+        stats = session.drag_stats
+        session.drag_stats = None
+        if self.drag_stats is stats:
+            self.drag_stats = None
+        if stats is None or not completed:
+            return
+
+        stats.drags = 1
+        self._finished_stats.append(stats)
+        self._trigger_stats()
+
+    def _dispatch_drag_stats(self, *largs):
+        finished = self._finished_stats
+        self._finished_stats = []
+        for stats in finished:
+            self.stats.add(stats)
+            self.dispatch('on_drag_stats', stats)
+
+    def _update_preview_pool(self, *largs):
+        pool = self.preview_pool
+        pool.bucket_size = self.preview_pool_bucket_size
+        pool.max_bytes = self.preview_pool_max_bytes
+        pool.trim()
+
+    def get_preview_scale(self, size):
+        """Returns the factor by which the preview of a widget of the given
+        size is scaled when rendered, given :attr:`preview_scale` and
+        :attr:`preview_max_pixels`.
+        """
+        scale = self.preview_scale
+        max_pixels = self.preview_max_pixels
+        area = size[0] * size[1]
+        if max_pixels and area * scale ** 2 > max_pixels:
+            scale = (max_pixels / float(area)) ** .5
+        return scale
+
+    def _get_preview_key(self, source_widget, scale):
+        return (
+            tuple(source_widget.size), self.preview_mode,
+            tuple(self.preview_background_color), scale)
+
+    def _get_cached_preview(self, source_widget, key):
+        entry = self._preview_cache.get(source_widget.uid)
+        if entry is None:
+            return None
+
+        widget_ref, buffer, cached_key, _ = entry
+        if widget_ref() is not source_widget or cached_key != key:
+            self._drop_cached_preview(source_widget.uid)
+            return None
+
+        self._preview_cache.move_to_end(source_widget.uid)
+        self.preview_cache_hits += 1
+        return buffer
+
+    def _cache_preview(self, source_widget, buffer, key):
+        uid = source_widget.uid
+        self._drop_cached_preview(uid)
+
+        bind_uid = source_widget.fbind(
+            'size', self._invalidate_cached_preview, uid)
+        widget_ref = ref(
+            source_widget, partial(self._invalidate_cached_preview, uid))
+        buffer.cached = True
+        self._preview_cache[uid] = widget_ref, buffer, key, bind_uid
+        self._preview_cache_bytes += self._get_cached_preview_size(buffer)
+        self._trim_preview_cache()
+
+    def _get_cached_preview_size(self, buffer):
+        return buffer.nbytes + len(buffer.pixels or b'')
+
+    def _invalidate_cached_preview(self, uid, *largs):
+        self._drop_cached_preview(uid)
+
+    def _drop_cached_preview(self, uid):
+        entry = self._preview_cache.pop(uid, None)
+        if entry is None:
+            return
+
+        widget_ref, buffer, _, bind_uid = entry
+        widget = widget_ref()
+        if widget is not None:
+            widget.unbind_uid('size', bind_uid)
+
+        self._preview_cache_bytes -= self._get_cached_preview_size(buffer)
+        buffer.cached = False
+        if not buffer.in_use:
+            self.preview_pool.release(buffer)
+
+    def _trim_preview_cache(self, *largs):
+        cache = self._preview_cache
+        if not self.preview_cache:
+            max_bytes = 0
+        else:
+            max_bytes = self.preview_cache_max_bytes
+
+        while cache and self._preview_cache_bytes > max_bytes:
+            self._drop_cached_preview(next(iter(cache)))
+
+    def invalidate_preview(self, widget=None):
+        """Drops the preview of ``widget`` cached when :attr:`preview_cache`
+        is True, so it is rendered again on the next drag. This should be
+        called when the widget's appearance changed.
+
+        If ``widget`` is None, the previews of all the widgets are dropped.
+        """
+        if widget is None:
+            for uid in list(self._preview_cache):
+                self._drop_cached_preview(uid)
+        else:
+            self._drop_cached_preview(widget.uid)
+
+    def get_session(self, touch):
+        """Returns the :class:`DragSession` of ``touch``, or None if the touch
+        is not handled by this controller.
+        """
+        return self.sessions.get(touch.uid)
+
+    def _get_default_session(self):
+        session = self._default_session
+        if session is None:
+            session = self._default_session = DragSession()
+        return session
+
+    def _acquire_preview_widget(self):
+        if self._preview_widgets:
+            return self._preview_widgets.pop()
+        return PreviewWidget(size_hint=(None, None))
+
+    def get_drag_group(self, source):
+        """Returns the list of widgets dragged together when a drag starts on
+        ``source``, i.e. :attr:`selection` if ``source`` is part of it, or None
+        if ``source`` is dragged alone.
+        """
+        selection = self.selection
+        if len(selection) > 1 and source in selection:
+            return list(selection)
+        return None
+
+    def get_group_rect(self, widgets):
+        """Returns the ``(x, y, right, top)`` window coordinates of the
+        bounding box of the widgets.
+        """
+        left = bottom = float('inf')
+        right = top = float('-inf')
+        for widget in widgets:
+            x, y = widget.to_window(*widget.pos)
+            left = min(left, x)
+            bottom = min(bottom, y)
+            right = max(right, x + widget.width)
+            top = max(top, y + widget.height)
+        return left, bottom, right, top
+
+    def prepare_preview_widget(self, source_widget, session=None):
+        """Renders ``source_widget`` into the preview widget of ``session``,
+        which is also set as :attr:`preview_widget`. If the session drags a
+        group of widgets, they are all rendered into the preview instead.
+
+        If ``session`` is None, the session of the drag for which the
+        controller called it is used or, when called from outside a drag, a
+        session of the controller that is not associated with any touch.
+        """
+        if session is None:
+            session = self._current_session or self._get_default_session()
+        if session.preview_widget is None:
+            session.preview_widget = self._acquire_preview_widget()
+        self.preview_widget = session.preview_widget
+
+        stats = session.drag_stats
+        if stats is None:
+            self._prepare_preview_widget(source_widget, session)
+            return
+
+        ts = perf_counter()
+        self._prepare_preview_widget(source_widget, session)
+        stats.capture_time += perf_counter() - ts
+        stats.capture_count += 1
+
+    def _prepare_preview_widget(self, source_widget, session):
+        self._release_preview_buffer(session)
+        group = session.widgets_dragged
+        if group:
+            left, bottom, right, top = self.get_group_rect(group)
+            size = right - left, top - bottom
+        else:
+            size = source_widget.size
+        widget = session.preview_widget
+        if self.preview_mode == 'live':
+            widget.size = size
+            widget.preview_texture = None
+            widget.live_background_color = self.preview_background_color
+            if group:
+                widget.live_origin = left, bottom
+                widget.live_widgets = group
+            else:
+                widget.live_origin = source_widget.to_window(
+                    *source_widget.pos)
+                widget.live_widgets = [source_widget]
+            return
+
+        scale = self.get_preview_scale(size)
+        w = int(ceil(size[0] * scale)) or 1
+        h = int(ceil(size[1] * scale)) or 1
+        copy_pixels = self.preview_mode == 'pixels'
+        # the preview of a group depends on the relative widget positions
+        use_cache = self.preview_cache and not group
+
+        buffer = None
+        if use_cache:
+            key = self._get_preview_key(source_widget, scale)
+            buffer = self._get_cached_preview(source_widget, key)
+
+        if buffer is None:
+            buffer = self.preview_pool.acquire(
+                (w, h), with_texture=copy_pixels)
+            background_color = self.preview_background_color
+            if group:
+                buffer.source = [item.proxy_ref for item in group]
+                buffer.origin = left, bottom
+                buffer.render_group(
+                    group, (left, bottom), background_color, scale)
+            else:
+                buffer.source = source_widget.proxy_ref
+                buffer.render(source_widget, background_color, scale)
+            if copy_pixels:
+                buffer.pixels = buffer.fbo.pixels
+                buffer.reload_texture(buffer.texture)
+
+            if use_cache:
+                self._cache_preview(source_widget, buffer, key)
+
+        buffer.in_use = True
+        session._preview_buffer = buffer
+        if copy_pixels:
+            session.preview_pixels = self.preview_pixels = buffer.pixels
+            texture = buffer.texture
+        else:
+            texture = buffer.fbo.texture
+
+        widget.size = size
+        widget.preview_texture = texture.get_region(0, 0, w, h)
+
+    def _release_preview_buffer(self, session):
+        buffer = session._preview_buffer
+        if buffer is None:
+            return
+
+        buffer.in_use = False
+        session._preview_buffer = None
+        if not buffer.cached:
+            self.preview_pool.release(buffer)
+
+    def clean_dragging(self, session=None):
+        """Removes the drag widget preview of ``session``, or of the session
+        used by :meth:`prepare_preview_widget` when it's None.
+        """
+        if session is None:
+            session = self._current_session or self._get_default_session()
+
+        widget = session.preview_widget
+        if widget is not None:
+            widget.preview_texture = None
+            widget.live_widgets = []
+            if widget.parent:
+                widget.parent.remove_widget(widget)
+            if widget is self._preview_widget:
+                self.preview_pixels = None
+
+        session.preview_pixels = None
+        self._release_preview_buffer(session)
+
+    def _end_session(self, session, completed=False):
+        self._call_with_session(session, self.clean_dragging)
+        self._clear_drop_targets_snapshot(session)
+        self._finish_drag_stats(session, completed)
+        session._pending_move = None
+        session.dragging = False
+
+        widget = session.preview_widget
+        if widget is not None:
+            session.preview_widget = None
+            self._preview_widgets.append(widget)
+
+        sessions = self.sessions
+        if sessions.get(session.touch.uid) is session:
+            del sessions[session.touch.uid]
+
+        self.dragging = any(s.dragging for s in sessions.values())
+        if self.widget_dragged is session.widget_dragged:
+            self.widget_dragged = None
+            for other in sessions.values():
+                self.widget_dragged = other.widget_dragged
+
+    def drag_down(self, source, touch):
+        """Called by :class:`DraggableObjectBehavior` when it got a touch down.
+        """
+        session = self.sessions.get(touch.uid)
+        if session is not None:
+            self._end_session(session)
+
+        group = self.get_drag_group(source)
+        session = self.sessions[touch.uid] = DragSession(touch, source, group)
+        if self.collect_stats:
+            session.drag_stats = self.drag_stats = DragStats()
+        preview = session.preview_widget = self._acquire_preview_widget()
+        self.preview_widget = preview
+        self.widget_dragged = source
+        if group:
+            pos = self.get_group_rect(group)[:2]
+        else:
+            pos = source.to_window(*source.pos)
+        session.start_widget_pos = preview.pos = pos
+
+        if not self.lazy_preview_capture:
+            self._call_with_session(
+                session, self.prepare_preview_widget,
+                source.drag_widget or source)
+            preview.canvas.opacity = 0
+            Window.add_widget(preview)
+        return False
+
+    def drag_move(self, source, touch):
+        """Called by :class:`DraggableObjectBehavior` when it got a touch move.
+        """
+        session = self.sessions.get(touch.uid)
+        if session is None:
+            return False
+
+        if not session.dragging:
+            session.touch_dx += abs(touch.dx)
+            session.touch_dy += abs(touch.dy)
+            if (session.touch_dx ** 2 + session.touch_dy ** 2) ** .5 \
+                    > self.drag_distance:
+                session.dragging = self.dragging = True
+                preview = session.preview_widget
+                if self.lazy_preview_capture:
+                    self._call_with_session(
+                        session, self.prepare_preview_widget,
+                        source.drag_widget or source)
+                    Window.add_widget(preview)
+                preview.canvas.opacity = .4
+                touch.ud['drag_cls'] = source.drag_cls
+                touch.ud['drag_widget'] = source
+                touch.ud['drag_widgets'] = session.widgets_dragged
+                touch.ud['drag_controller'] = self
+                touch.ud['drag_stats'] = session.drag_stats
+                touch.ud['drag_origins'] = session.drag_origins = \
+                    self._get_drag_origins(session)
+                pos = source.to_window(*touch.pos)
+                stats = session.drag_stats
+                if stats is None:
+                    self._initiate_drag(session)
+                else:
+                    ts = perf_counter()
+                    self._initiate_drag(session)
+                    stats.initiate_drag_time += perf_counter() - ts
+                self._snapshot_drop_targets(source.drag_cls, session)
+            else:
+                return False
+        else:
+            pos = source.to_window(*touch.pos)
+
+        offset = touch.x - touch.ox, touch.y - touch.oy
+        if self.coalesce_moves:
+            session._pending_move = offset, pos
+            self._trigger_move()
+        else:
+            self._process_move(session, offset, pos)
+        return False
+
+    def _get_drag_origins(self, session):
+        origins = []
+        for widget in session.widgets_dragged or [session.widget_dragged]:
+            parent = widget.parent
+            index = None
+            if parent is not None:
+                index = parent.children.index(widget)
+            origins.append((widget, parent, index))
+        return origins
+
+    def _initiate_drag(self, session):
+        for widget in session.widgets_dragged or [session.widget_dragged]:
+            widget.initiate_drag()
+
+    def _complete_drag(self, session):
+        for widget in session.widgets_dragged or [session.widget_dragged]:
+            widget.complete_drag()
+
+    def _process_move(self, session, offset, pos):
+        stats = session.drag_stats
+        if stats is None:
+            self._move_preview(session, offset, pos)
+            return
+
+        ts = perf_counter()
+        self._move_preview(session, offset, pos)
+        stats.record_move(perf_counter() - ts)
+
+    def _move_preview(self, session, offset, pos):
+        x, y = session.start_widget_pos
+        session.preview_widget.pos = x + offset[0], y + offset[1]
+
+        if session._drop_targets_snapshot is None:
+            return
+
+        target = self.get_drop_target_at(pos[0], pos[1], session)
+        current = session._drop_target
+        if current is not target:
+            session._drop_target = target
+            if current is not None:
+                current._drop_target_leave(session.widget_dragged)
+            if target is not None:
+                target.dispatch('on_drag_enter', session.widget_dragged)
+        if target is not None:
+            target._drop_target_move(pos[0], pos[1], session.drag_stats)
+
+    def _process_pending_move(self, *largs):
+        for session in list(self.sessions.values()):
+            if session._pending_move is not None:
+                offset, pos = session._pending_move
+                session._pending_move = None
+                self._process_move(session, offset, pos)
+
+    def drag_up(self, source, touch):
+        """Called by :class:`DraggableObjectBehavior` when it got a touch up.
+        """
+        session = self.sessions.get(touch.uid)
+        if session is None:
+            return False
+
+        session._pending_move = None
+        self._call_with_session(session, self.clean_dragging)
+        if not session.dragging:
+            self._end_session(session)
+            return False
+
+        if session._drop_targets_snapshot is not None:
+            pos = source.to_window(*touch.pos)
+            target = self.get_drop_target_at(pos[0], pos[1], session)
+            current = session._drop_target
+            if current is not target:
+                session._drop_target = target
+                if current is not None:
+                    current._drop_target_leave(source)
+                if target is not None:
+                    target.dispatch('on_drag_enter', source)
+            if target is not None:
+                target._drop_target_drop(
+                    pos[0], pos[1], source, session.drag_stats,
+                    session.widgets_dragged, session.drag_origins)
+            self._clear_drop_targets_snapshot(session)
+
+        session.dragging = False
+        stats = session.drag_stats
+        if stats is None:
+            self._complete_drag(session)
+        else:
+            ts = perf_counter()
+            self._complete_drag(session)
+            stats.complete_drag_time += perf_counter() - ts
+        self._end_session(session, True)
+        return False
+
+    def register_drop_target(self, layout):
+        """Registers the :class:`DraggableLayoutBehavior` under each of its
+        :attr:`DraggableLayoutBehavior.drag_classes`, so that drags started
+        by this controller are dispatched to the layout directly, rather than
+        through the widget tree.
+
+        It's called automatically when the layout's
+        :attr:`DraggableLayoutBehavior.drop_controller` is set to this
+        controller.
+        """
+        for drag_cls in layout.drag_classes:
+            if is_drag_cls_pattern(drag_cls):
+                self._pattern_drop_targets.add(layout)
+                continue
+
+            targets = self._drop_targets.get(drag_cls)
+            if targets is None:
+                targets = self._drop_targets[drag_cls] = WeakSet()
+            targets.add(layout)
+
+    def unregister_drop_target(self, layout):
+        """Removes a layout previously registered with
+        :meth:`register_drop_target`.
+        """
+        for drag_cls, targets in list(self._drop_targets.items()):
+            targets.discard(layout)
+            if not targets:
+                del self._drop_targets[drag_cls]
+        self._pattern_drop_targets.discard(layout)
+
+    def get_drop_targets(self, drag_cls):
+        """Returns the layouts registered with :meth:`register_drop_target`
+        that accept widgets whose :attr:`DraggableObjectBehavior.drag_cls` is
+        ``drag_cls``.
+        """
+        targets = set(self._drop_targets.get(drag_cls, ()))
+        for layout in self._pattern_drop_targets:
+            if layout not in targets and layout.accepts_drag_cls(drag_cls):
+                targets.add(layout)
+        return list(targets)
+
+    def _snapshot_drop_targets(self, drag_cls, session):
+        targets = []
+        for layout in self.get_drop_targets(drag_cls):
+            if layout.get_root_window() is None:
+                continue
+
+            depth = 0
+            parent = layout.parent
+            # the window is its own parent
+            while parent is not None and parent is not parent.parent:
+                depth += 1
+                parent = parent.parent
+            targets.append((depth, layout))
+
+        # nested layouts get the drag before their parents
+        targets.sort(key=itemgetter(0), reverse=True)
+        session._drop_targets_snapshot = [layout for _, layout in targets]
+        session._drop_target = None
+
+        widget = session.widget_dragged
+        for layout in session._drop_targets_snapshot:
+            layout.dispatch('on_drag_start', widget)
+
+    def _clear_drop_targets_snapshot(self, session):
+        snapshot = session._drop_targets_snapshot
+        current = session._drop_target
+        session._drop_targets_snapshot = None
+        session._drop_target = None
+        if snapshot is None:
+            return
+
+        widget = session.widget_dragged
+        if current is not None:
+            current._drop_target_leave(widget)
+        for layout in snapshot:
+            layout._invalidate_drag_clip()
+            layout.dispatch('on_drag_end', widget)
+
+    def get_drop_target_at(self, x, y, session=None):
+        """Returns the registered layout accepting the widget dragged in
+        ``session`` that is under the window position ``(x, y)``, or None.
+
+        If ``session`` is None, the most recently started drag is used.
+        """
+        if session is None:
+            if not self.sessions:
+                return None
+            session = list(self.sessions.values())[-1]
+
+        stats = session.drag_stats
+        for layout in session._drop_targets_snapshot or ():
+            if stats is not None:
+                stats.layouts_visited += 1
+            left, bottom, right, top = layout.get_drag_clip_rect()
+            if not layout._drag_clip_translate_only:
+                if layout.collide_drag_clip(*layout._window_to_drag_pos(x, y)):
+                    return layout
+            elif left <= x <= right and bottom <= y <= top:
+                return layout
+        return None
+
+
+_default_controller = None
+
+
+def get_default_drag_controller():
+    """Returns the :class:`DraggableController` shared by all the
+    :class:`DraggableObjectBehavior` widgets whose
+    :attr:`DraggableObjectBehavior.use_default_controller` is True. It's
+    created on the first call.
+    """
+    global _default_controller
+    if _default_controller is None:
+        _default_controller = DraggableController()
+    return _default_controller
+
+
+class DraggableLayoutBehavior(object):
+    """Adds support to a layout such that we can drag widgets **into** this
+    layout and preview it while dragging.
+
+    Only :class:`DraggableObjectBehavior` widgets whose
+    :attr:`DraggableObjectBehavior.drag_cls` are in :attr:`drag_classes` will be
+    dropable into the layout.
+
+    :Events:
+        `on_drag_start`: `drag_widget`
+            Dispatched when a drag of a widget that can be dropped into the
+            layout starts. Only dispatched when the layout is registered with
+            the widget's controller, see :attr:`drag_controller`.
+        `on_drag_enter`: `drag_widget`
+            Dispatched when a drag that the layout accepts enters the layout.
+        `on_drag_leave`: `drag_widget`
+            Dispatched when the drag leaves the layout, or was dropped on it.
+        `on_drag_end`: `drag_widget`
+            Dispatched when a drag for which `on_drag_start` was dispatched
+            ends, whether dropped or not.
+    """
+
+    __events__ = (
+        'on_drag_start', 'on_drag_enter', 'on_drag_leave', 'on_drag_end')
+
+    spacer_props = DictProperty({})
+    """The properties of :attr:`spacer_widget`, which will be set according to
+    this dict. This enables setting the sizing info for the preview widget in
+    the layout.
+    """
+
+    spacer_widget = ObjectProperty(None)
+    """The widget that is added to the layout to show where the dragged widget
+    could be dropped.
+
+    Defaults to :class:`SpacerWidget` if not set.
+    """
+
+    drag_classes = ListProperty([])
+    """During a drag, the controller will try to preview and add the dragged
+    :class:`DraggableObjectBehavior` to this layout widget when it is over the
+    widget's area. But, it will only do it if the dragged widget's
+    :attr:`DraggableObjectBehavior.drag_cls` is in the layout's
+    :attr:`drag_classes`.
+
+    This allows selecting which widgets can be dropped where.
+
+    Besides exact names, the list may contain glob patterns, as understood by
+    :mod:`fnmatch`. E.g. ``'card.*'`` accepts ``'card.red'`` and
+    ``'card.red.small'``, but not ``'card'``. See :meth:`accepts_drag_cls`.
+    """
+
+    drop_controller = ObjectProperty(None, allownone=True)
+    """An optional :class:`DraggableController` with which this layout is
+    registered as a drop target, see
+    :meth:`DraggableController.register_drop_target`.
+
+    If set, drags of widgets whose
+    :attr:`DraggableObjectBehavior.drag_controller` is this controller are
+    dispatched by the controller directly to the layout under the touch,
+    among the layouts that accept the dragged widget. Such drags are then
+    ignored when they reach the layout through the widget tree. If None, the
+    default, the layout handles drags as the touch events propagate through
+    the widget tree.
+    """
+
+    drag_append_end = BooleanProperty(False)
+    """Whether the :class:`DraggableObjectBehavior` when dragged over the
+    layout's area should be previewed and return an index that would add it at
+    that location in its children, or if it will only support adding the widget
+    to the end of children.
+    """
+
+    batch_drop = BooleanProperty(False)
+    """Whether drops are applied as a single batch with :meth:`apply_drop`.
+
+    If True, the spacer is left in the layout until the drop is applied, and
+    the default :meth:`handle_drag_release` and
+    :meth:`handle_drag_release_multiple` call :meth:`apply_drop`. If they are
+    overwritten, they must call :meth:`apply_drop` rather than
+    ``add_widget``, otherwise the spacer is only removed afterwards.
+    """
+
+    drag_scroll_margin = NumericProperty(0)
+    """The distance from the edges of the closest
+    :class:`~kivy.uix.scrollview.ScrollView` containing the layout within
+    which a drag over the layout scrolls the :class:`ScrollView`, to reach
+    drop positions that are not visible, e.g. ``'40dp'``.
+
+    The deeper the touch is in the margin, the faster it scrolls, up to
+    :attr:`drag_scroll_speed` at the edge.
+
+    Defaults to zero, which disables it.
+    """
+
+    drag_scroll_speed = NumericProperty('800dp')
+    """The speed, in pixels per second, at which the
+    :class:`~kivy.uix.scrollview.ScrollView` is scrolled when the touch is at
+    its edge, see :attr:`drag_scroll_margin`.
+    """
+
+    drag_hysteresis = NumericProperty(0)
+    """The distance the touch must move from where the spacer was last moved,
+    along either axis, before the spacer is moved again. A drop within that
+    distance lands where the spacer is shown.
+
+    This keeps the spacer from flipping back and forth, each flip relaying out
+    the layout, when the touch jitters around the boundary between two drop
+    positions. E.g. ``'4dp'``.
+
+    Defaults to zero, which disables it.
+    """
+
+    spacer_move_count = NumericProperty(0)
+    """The number of times the spacer was added to or moved within the
+    layout. It's never reset by the layout, so it can be used to measure the
+    effect of e.g. :attr:`drag_hysteresis`.
+    """
+
+    pending_drops = ListProperty([])
+    """The placeholders of the asynchronous drops that are still pending, see
+    :meth:`handle_drag_release`. Read only.
+    """
+
+    _drag_hit_index = None
+
+    _drag_child_indices = None
+
+    _pending_drag_pos = None
+
+    _trigger_drag_move = None
+
+    _registered_drop_controller = None
+
+    _drag_stats = None
+
+    _drag_origins = None
+
+    _drag_clip_rect = None
+
+    _drag_clip_local_rect = None
+
+    _drag_clip_widgets = []
+
+    _drag_clip_translate_only = True
+
+    _drag_scroll_view = None
+
+    _drag_spacer_pos = None
+
+    _drag_scroll_pos = None
+
+    _drag_scroll_event = None
+
+    _drag_cls_names = set()
+
+    _drag_cls_pattern = None
+
+    _drag_cls_matches = {}
+
+    def __init__(self, **kwargs):
+        super(DraggableLayoutBehavior, self).__init__(**kwargs)
+        if self.spacer_widget is None:
+            self.spacer_widget = SpacerWidget()
+        self.fbind('spacer_props', self._track_spacer_props)
+        self._track_spacer_props()
+        self.fbind('children', self._invalidate_drag_indices)
+        self.fbind('drag_classes', self._compile_drag_classes)
+        self._compile_drag_classes()
+        self.fbind('drop_controller', self._update_drop_target_registration)
+        self.fbind('drag_classes', self._update_drop_target_registration)
+        self._update_drop_target_registration()
+
+    def _compile_drag_classes(self, *largs):
+        names = set()
+        patterns = []
+        for drag_cls in self.drag_classes:
+            if is_drag_cls_pattern(drag_cls):
+                patterns.append(fnmatch.translate(drag_cls))
+            else:
+                names.add(drag_cls)
+
+        self._drag_cls_names = names
+        self._drag_cls_pattern = None
+        if patterns:
+            self._drag_cls_pattern = re.compile('|'.join(patterns))
+        self._drag_cls_matches = {}
+
+    def get_drag_clip_rect(self):
+        """Returns the ``(x, y, right, top)`` rectangle, in window coordinates,
+        of the area of the layout that is not clipped by any of its parents,
+        i.e. :func:`get_window_clip_rect`.
+
+        The rectangle is cached until the ``pos``, ``size``, ``parent`` or
+        scroll offset of the layout or any of its parents changes, so during a
+        drag it's typically only computed once.
+        """
+        if self._drag_clip_rect is None:
+            self._drag_clip_rect = get_window_clip_rect(self)
+            self._bind_drag_clip()
+        return self._drag_clip_rect
+
+    def _bind_drag_clip(self):
+        widgets = self._drag_clip_widgets = []
+        callback = self._invalidate_drag_clip
+        translate_only = True
+        widget = self
+        while widget is not None and hasattr(widget, 'to_parent'):
+            widgets.append(widget)
+            if widget.property('transform', quiet=True) is not None:
+                translate_only = False
+            for name in _drag_clip_props:
+                if widget.property(name, quiet=True) is not None:
+                    widget.fbind(name, callback)
+            widget = widget.parent
+        self._drag_clip_translate_only = translate_only
+
+    def _invalidate_drag_clip(self, *largs):
+        callback = self._invalidate_drag_clip
+        for widget in self._drag_clip_widgets:
+            for name in _drag_clip_props:
+                if widget.property(name, quiet=True) is not None:
+                    widget.funbind(name, callback)
+
+        self._drag_clip_widgets = []
+        self._drag_clip_rect = self._drag_clip_local_rect = None
+        self._drag_clip_translate_only = True
+        self._drag_scroll_view = None
+
+    def collide_drag_clip(self, x, y):
+        """Returns whether ``(x, y)``, in the coordinates of the layout's
+        parent, is in :meth:`get_drag_clip_rect`. This is the same as
+        :func:`collide_parent_tree`, but it's computed once per drag rather
+        than once per touch event.
+
+        The cached rectangle assumes the parents only translate their
+        children. If the layout or any of its parents has a ``transform``,
+        e.g. a rotated :class:`~kivy.uix.scatter.Scatter`,
+        :func:`collide_parent_tree` is used instead.
+        """
+        if not self._drag_clip_translate_only:
+            return collide_parent_tree(self, x, y)
+
+        rect = self._drag_clip_local_rect
+        if rect is None or self._drag_clip_rect is None:
+            left, bottom, right, top = self.get_drag_clip_rect()
+            if not self._drag_clip_translate_only:
+                return collide_parent_tree(self, x, y)
+            parent = self.parent
+            if parent is not None:
+                left, bottom = parent.to_widget(left, bottom)
+                right, top = parent.to_widget(right, top)
+            rect = self._drag_clip_local_rect = left, bottom, right, top
+
+        left, bottom, right, top = rect
+        return left <= x <= right and bottom <= y <= top
+
+    def accepts_drag_cls(self, drag_cls):
+        """Returns whether a :class:`DraggableObjectBehavior` whose
+        :attr:`DraggableObjectBehavior.drag_cls` is ``drag_cls`` can be
+        dropped into this layout, according to :attr:`drag_classes`.
+
+        Exact names are looked up in a set and the results of matching the
+        patterns are cached, so this is cheap to call on every touch event.
+        """
+        if drag_cls in self._drag_cls_names:
+            return True
+
+        pattern = self._drag_cls_pattern
+        if pattern is None or drag_cls is None:
+            return False
+
+        matches = self._drag_cls_matches
+        if drag_cls not in matches:
+            matches[drag_cls] = pattern.match(drag_cls) is not None
+        return matches[drag_cls]
+
+    def on_drag_start(self, drag_widget):
+        pass
+
+    def on_drag_enter(self, drag_widget):
+        pass
+
+    def on_drag_leave(self, drag_widget):
+        pass
+
+    def on_drag_end(self, drag_widget):
+        pass
+
+    def _update_drop_target_registration(self, *largs):
+        controller = self._registered_drop_controller
+        if controller is not None:
+            controller.unregister_drop_target(self)
+
+        controller = self._registered_drop_controller = self.drop_controller
+        if controller is not None:
+            controller.register_drop_target(self)
+
+    def _invalidate_drag_indices(self, *largs):
+        self._drag_hit_index = None
+        self._drag_child_indices = None
+
+    def get_child_index(self, widget):
+        """Returns the index of ``widget`` in ``children``, like
+        ``children.index(widget)``, but using a mapping that is only rebuilt
+        when the children change.
         """
+        indices = self._drag_child_indices
+        if indices is None:
+            indices = self._drag_child_indices = {
+                child: i for i, child in enumerate(self.children)}
+        return indices[widget]
+
+    def _track_spacer_props(self, *largs):
+        for key, value in self.spacer_props.items():
+            setattr(self.spacer_widget, key, value)
+
+    def _touch_uid(self):
+        return '{}.{}'.format(self.__class__.__name__, self.uid)
+
+    def compare_pos_to_widget(self, widget, pos):
+        """After we call :meth:`get_widget_under_drag` to find the widget in
+        ``children`` that is currently under the given pos (the current mouse
+        pos that drags a widget), we call this to find whether the mouse pos
+        indicates that the dragged widget needs to be added before or after
+        the widget returned by :meth:`get_widget_under_drag`.
+
+        It must return either the string `"before"`, or `"after"`.
+
+        See :meth:`get_drop_insertion_index_move` and
+        :meth:`get_drop_insertion_index_up`.
+        """
+        return 'before'
+
+    def get_widget_under_drag(self, x, y):
+        """Returns the widget in children that is under the given position
+        (current mouse pos that drags the widget).
+
+        See :meth:`get_drop_insertion_index_move` and
+        :meth:`get_drop_insertion_index_up`.
+        """
+        for widget in self.children:
+            if widget.collide_point(x, y):
+                return widget
+        return None
+
+    def handle_drag_release(self, index, drag_widget):
+        """This is called when a widget is dropped in the layout.
+        ``index`` is the index in `children` where the widget should be added.
+        ``drag_widget`` is the :class:`DraggableObjectBehavior` that was dropped
+        there.
+
+        This must be overwritten by the inherited class to actually do the
+        ``add_widget`` or something else, unless :attr:`batch_drop` is True,
+        in which case it calls :meth:`apply_drop` by default.
+
+        If the drop needs slow work, e.g. to persist the new order, it can
+        instead return a coroutine or a future, and leave the layout as is.
+        A placeholder from :meth:`create_drop_placeholder` is then shown at
+        ``index`` while the work runs, see :func:`run_drop_work`, and when it
+        finishes, :meth:`commit_drop` or :meth:`rollback_drop` is called.
+        """
+        if self.batch_drop:
+            self.apply_drop(index, [drag_widget])
+
+    def handle_drag_release_multiple(self, index, drag_widgets):
+        """This is called instead of :meth:`handle_drag_release` when a group
+        of widgets, dragged together from
+        :attr:`DraggableController.selection`, is dropped in the layout.
+        ``index`` is the index in `children` where the widgets should be added
+        and ``drag_widgets`` is the list of the dropped widgets.
+
+        By default, it calls :meth:`handle_drag_release` for each widget, in
+        an order such that they end up in the layout in the order of the
+        list. Since adding widgets only schedules the layout for the next
+        frame, the layout is still only computed once. It can be overwritten
+        to insert the widgets in one go, e.g. when the layout shows a data
+        model rather than the widgets themselves.
+
+        If :attr:`batch_drop` is True, it calls :meth:`apply_drop` instead.
+        If :meth:`handle_drag_release` returns asynchronous work for a
+        widget, each such widget gets its own placeholder.
+        """
+        if self.batch_drop:
+            self.apply_drop(index, drag_widgets)
+            return
+
+        for drag_widget in drag_widgets:
+            result = self.handle_drag_release(index, drag_widget)
+            if is_drop_work(result):
+                self._start_async_drop(index, [drag_widget], result)
+
+    def _fits_spacer(self, widget):
+        spacer = self.spacer_widget
+        for name in ('size_hint', 'size_hint_min', 'size_hint_max'):
+            if getattr(widget, name) != getattr(spacer, name):
+                return False
+        if widget.pos_hint != spacer.pos_hint:
+            return False
+        hint_x, hint_y = widget.size_hint
+        return (hint_x is not None or widget.width == spacer.width) and \
+            (hint_y is not None or widget.height == spacer.height)
+
+    def apply_drop(self, index, drag_widgets):
+        """Inserts the dropped widgets at ``index`` in ``children``, as a
+        single batch, and returns whether the layout's children changed.
+
+        ``index`` is as passed to :meth:`handle_drag_release`, i.e. an index
+        into ``children`` without the spacer. The widgets are removed from
+        their current parent, if any, and the spacer is removed.
+
+        If the children end up the same as before the drag, without the
+        spacer, nothing else is changed. If a single widget replaces the spacer
+        in its slot and has the same sizing hints, it's given the spacer's
+        position and size and, if the layout wasn't already going to be
+        updated, the layout pass is skipped.
+        """
+        spacer = self.spacer_widget
+        trigger = self._trigger_layout
+        pending = trigger.is_triggered
+        moving = set(drag_widgets)
+
+        current = [child for child in self.children if child is not spacer]
+        head = [child for child in current[:index] if child not in moving]
+        tail = [child for child in current[index:] if child not in moving]
+        if head + drag_widgets[::-1] + tail == current:
+            if spacer.parent is self:
+                self.remove_widget(spacer)
+            return False
+
+        geometry = None
+        if spacer.parent is self:
+            if len(drag_widgets) == 1 and \
+                    self.get_child_index(spacer) == index and \
+                    drag_widgets[0].parent is not self and \
+                    self._fits_spacer(drag_widgets[0]):
+                geometry = spacer.pos, spacer.size
+            self.remove_widget(spacer)
+
+        for widget in drag_widgets:
+            if widget.parent is not None:
+                widget.parent.remove_widget(widget)
+        index = len(head)
+        for widget in drag_widgets:
+            self.add_widget(widget, index)
+
+        if geometry is not None and not pending:
+            widget = drag_widgets[0]
+            widget.pos, widget.size = geometry
+            trigger.cancel()
+        return True
+
+    def move_spacer(self, index):
+        """Moves :attr:`spacer_widget` to ``index`` in ``children``, where
+        ``index`` is as returned by :meth:`get_drop_insertion_index_move`,
+        i.e. an index into ``children`` as it is before the move.
+
+        If the spacer is already in the layout, it is moved within
+        ``children`` and the canvas in place, so the layout sees a single
+        change of its children, rather than a removal followed by an addition.
+        """
+        spacer = self.spacer_widget
+        if spacer.parent is not self:
+            if spacer.parent is not None:
+                spacer.parent.remove_widget(spacer)
+            self._count_spacer_move()
+            self.add_widget(spacer, index=index)
+            return
+
+        i = self.get_child_index(spacer)
+        if i < index:
+            index -= 1
+        if i == index:
+            return
+
+        self._count_spacer_move()
+
+        children = self.children[:]
+        del children[i]
+        children.insert(index, spacer)
+
+        # the spacer is drawn right before the child that is before it
+        canvas = self.canvas
+        if canvas.indexof(spacer.canvas) != -1:
+            canvas.remove(spacer.canvas)
+            next_index = -1
+            if index:
+                next_index = canvas.indexof(children[index - 1].canvas)
+            if next_index == -1:
+                canvas.add(spacer.canvas)
+            else:
+                canvas.insert(next_index, spacer.canvas)
+
+        self.children[:] = children
+
+    def is_in_drag_dead_zone(self, x, y):
+        """Returns whether ``(x, y)`` is within :attr:`drag_hysteresis` of
+        where the spacer was last moved, in which case
+        :meth:`get_drop_insertion_index_move` doesn't move it and
+        :meth:`get_drop_insertion_index_up` returns the spacer's position.
+        """
+        pos = self._drag_spacer_pos
+        hysteresis = self.drag_hysteresis
+        if pos is None or not hysteresis:
+            return False
+        return abs(x - pos[0]) < hysteresis and abs(y - pos[1]) < hysteresis
+
+    def get_drop_insertion_index_move(self, x, y):
+        """During a drag, it is called with when we need to figure out where
+        to display the spacer widget in the layout.
+
+        It calls :meth:`get_widget_under_drag` to find the widget in the layout
+        currently under the mouse pos. Then it uses
+        :meth:`compare_pos_to_widget` to figure out if it should be added
+        before, or after that widget and returns the index in ``children``
+        where the spacer should be added to represent the potential drop.
+
+        If the spacer is under the current pos, or if no widget is under it
+        (:meth:`get_widget_under_drag` returned ``None``), or if the pos is in
+        :meth:`is_in_drag_dead_zone`, we return None, otherwise the index.
+        """
+        if self.is_in_drag_dead_zone(x, y):
+            return None
+
         spacer = self.spacer_widget
         widget = self.get_widget_under_drag(x, y)
         if widget == spacer:
-            index = self.children.index(spacer)
+            return None
+
+        if widget is None:
+            self.move_spacer(0)
+            return None
+
+        i = self.get_child_index(widget)
+        j = None
+        if self.compare_pos_to_widget(widget, (x, y)) == 'before':
+            if i == len(self.children) - 1 or self.children[i + 1] != spacer:
+                j = i + 1
+        else:
+            if not i or self.children[i - 1] != spacer:
+                j = i
+        return j
+
+    def get_drop_insertion_index_up(self, x, y, remove_spacer=True):
+        """When dropping a drag, it is called to get the index in children of
+        the layout where the widget was dropped and where it needs to be
+        inserted.
+
+        It calls :meth:`get_widget_under_drag` to find the widget in the layout
+        currently under the mouse pos. Then it uses
+        :meth:`compare_pos_to_widget` to figure out if it should be added
+        before, or after that widget and returns the index in ``children``
+        where the it should be added to complete the drop.
+
+        If the pos is in :meth:`is_in_drag_dead_zone`, the spacer's position is
+        used instead, so the widget is dropped where the spacer showed it.
+
+        The spacer is removed, unless ``remove_spacer`` is False, but the
+        returned index is always an index into ``children`` without the spacer.
+        """
+        spacer = self.spacer_widget
+        if spacer.parent is self and self.is_in_drag_dead_zone(x, y):
+            widget = spacer
+        else:
+            widget = self.get_widget_under_drag(x, y)
+        if widget == spacer:
+            index = self.get_child_index(spacer)
         elif widget is None:
             index = 0
         else:
             if self.compare_pos_to_widget(widget, (x, y)) == 'before':
-                index = self.children.index(widget) + 1
+                index = self.get_child_index(widget) + 1
             else:
-                index = self.children.index(widget)
+                index = self.get_child_index(widget)
 
         if spacer.parent:
-            i = self.children.index(spacer)
-            self.remove_widget(spacer)
+            i = self.get_child_index(spacer)
+            if remove_spacer:
+                self._remove_spacer()
             if i < index:
                 index -= 1
         return index
 
-    def on_touch_move(self, touch):
+    def _get_drop_append_index(self):
+        return 0
+
+    def _count_spacer_move(self):
+        self.spacer_move_count += 1
+        if self._drag_stats is not None:
+            self._drag_stats.spacer_moves += 1
+
+    def _remove_spacer(self):
+        self._stop_drag_scroll()
+        self._invalidate_drag_clip()
+        self._drag_stats = None
+        self._pending_drag_pos = None
+        self._drag_spacer_pos = None
+        if self._trigger_drag_move is not None:
+            self._trigger_drag_move.cancel()
+
+        spacer = self.spacer_widget
+        if spacer.parent:
+            self.remove_widget(spacer)
+
+    def _process_pending_drag_move(self, *largs):
+        if self._pending_drag_pos is not None:
+            x, y = self._pending_drag_pos
+            self._pending_drag_pos = None
+            self._process_drag_move(x, y)
+
+    def _process_drag_move(self, x, y):
+        # while auto scrolling, the spacer is moved once per scroll step
+        if self.drag_scroll_margin and self._update_drag_scroll(x, y):
+            return
+        self._apply_drag_move(x, y)
+
+    def _apply_drag_move(self, x, y):
+        stats = self._drag_stats
+        if stats is None:
+            self._move_drag_spacer(x, y)
+            return
+
+        ts = perf_counter()
+        self._move_drag_spacer(x, y)
+        stats.layout_move_time += perf_counter() - ts
+
+    def get_drag_scroll_view(self):
+        """Returns the closest :class:`~kivy.uix.scrollview.ScrollView`
+        containing the layout, or None. It is scrolled when dragging near its
+        edges, see :attr:`drag_scroll_margin`.
+        """
+        scroll_view = self._drag_scroll_view
+        if scroll_view is None:
+            scroll_view = self.parent
+            # the window is its own parent
+            while scroll_view is not None and \
+                    scroll_view is not scroll_view.parent and \
+                    not isinstance(scroll_view, ScrollView):
+                scroll_view = scroll_view.parent
+            if not isinstance(scroll_view, ScrollView):
+                scroll_view = None
+            self._drag_scroll_view = scroll_view
+        return scroll_view
+
+    def get_drag_scroll_velocity(self, x, y):
+        """Returns the ``(vx, vy)`` velocity, in pixels per second, at which
+        the :meth:`get_drag_scroll_view` should be scrolled when dragging at
+        ``(x, y)``, in window coordinates. It's proportional to how deep the
+        position is within :attr:`drag_scroll_margin` of the edges, and zero
+        in the directions the view can't scroll any further.
+        """
+        scroll_view = self.get_drag_scroll_view()
+        if scroll_view is None:
+            return 0, 0
+
+        left, bottom = scroll_view.to_window(*scroll_view.pos)
+        right, top = scroll_view.to_window(scroll_view.right, scroll_view.top)
+        speed = self.drag_scroll_speed
+        margin = self.drag_scroll_margin
+
+        velocity = [0, 0]
+        for i, (low, high, pos, enabled, scroll) in enumerate((
+                (left, right, x, scroll_view.do_scroll_x,
+                 scroll_view.scroll_x),
+                (bottom, top, y, scroll_view.do_scroll_y,
+                 scroll_view.scroll_y))):
+            edge = min(margin, (high - low) / 2.)
+            if not enabled or edge <= 0 or not low <= pos <= high:
+                continue
+            if pos < low + edge and scroll > 0:
+                velocity[i] = -speed * (low + edge - pos) / edge
+            elif pos > high - edge and scroll < 1:
+                velocity[i] = speed * (pos - high + edge) / edge
+        return tuple(velocity)
+
+    def _update_drag_scroll(self, x, y):
+        # the inverse of _window_to_drag_pos, (x, y) is in the parent's local
+        # coordinates, which initial=False transforms from
+        parent = self.parent
+        if parent is not None:
+            x, y = parent.to_window(x, y, initial=False)
+        pos = self._drag_scroll_pos = x, y
+        if self.get_drag_scroll_velocity(*pos) == (0, 0):
+            self._stop_drag_scroll()
+            return False
+
+        if self._drag_scroll_event is None:
+            self._drag_scroll_event = Clock.schedule_interval(
+                self._drag_scroll_step, 0)
+        return True
+
+    def _stop_drag_scroll(self):
+        if self._drag_scroll_event is not None:
+            self._drag_scroll_event.cancel()
+            self._drag_scroll_event = None
+
+    def _drag_scroll_step(self, dt):
+        x, y = self._drag_scroll_pos
+        scroll_view = self.get_drag_scroll_view()
+        vx, vy = self.get_drag_scroll_velocity(x, y)
+        if vx or vy:
+            width, height = scroll_view.viewport_size
+            if vx and width > scroll_view.width:
+                scroll_view.scroll_x = min(1., max(
+                    0., scroll_view.scroll_x +
+                    vx * dt / (width - scroll_view.width)))
+            if vy and height > scroll_view.height:
+                scroll_view.scroll_y = min(1., max(
+                    0., scroll_view.scroll_y +
+                    vy * dt / (height - scroll_view.height)))
+            # move the content now, rather than on the next frame, so the
+            # spacer is placed relative to where the content is drawn
+            scroll_view.update_from_scroll()
+
+        self._apply_drag_move(*self._window_to_drag_pos(x, y))
+        if not (vx or vy):
+            self._drag_scroll_event = None
+            return False
+
+    def _move_drag_spacer(self, x, y):
+        if self.drag_append_end:
+            spacer = self.spacer_widget
+            if not spacer.parent:
+                self._count_spacer_move()
+                self.add_widget(spacer)
+            return
+
+        j = self.get_drop_insertion_index_move(x, y)
+        if j is not None:
+            self.move_spacer(j)
+            self._drag_spacer_pos = x, y
+
+    def _window_to_drag_pos(self, x, y):
+        # like the touch handlers, drags are processed in the coordinates of
+        # the layout's parent
+        parent = self.parent
+        if parent is None:
+            return x, y
+        return parent.to_widget(x, y)
+
+    def _drop_target_move(self, x, y, stats=None):
+        self._drag_stats = stats
+        self._process_drag_move(*self._window_to_drag_pos(x, y))
+
+    def _drop_target_leave(self, drag_widget):
+        self._remove_spacer()
+        self.dispatch('on_drag_leave', drag_widget)
+
+    def _drop_target_drop(
+            self, x, y, drag_widget, stats=None, drag_widgets=None,
+            drag_origins=None):
+        self._drag_stats = stats
+        self._drag_origins = drag_origins
+        x, y = self._window_to_drag_pos(x, y)
+        self._process_drag_drop(x, y, drag_widget, drag_widgets)
+
+    def _process_drag_drop(self, x, y, drag_widget, drag_widgets=None):
+        stats = self._drag_stats
+        # when batching, the spacer is removed by apply_drop
+        batch = self.batch_drop
+        if self.drag_append_end:
+            if not batch:
+                self._remove_spacer()
+            index = self._get_drop_append_index()
+        else:
+            index = self.get_drop_insertion_index_up(
+                x, y, remove_spacer=not batch)
+
+        if stats is not None:
+            ts = perf_counter()
+        if drag_widgets:
+            result = self.handle_drag_release_multiple(index, drag_widgets)
+        else:
+            result = self.handle_drag_release(index, drag_widget)
+        if is_drop_work(result):
+            self._start_async_drop(
+                index, drag_widgets or [drag_widget], result)
+        if stats is not None:
+            stats.drag_release_time += perf_counter() - ts
+        if batch:
+            self._remove_spacer()
+        self._drag_origins = None
+
+    def create_drop_placeholder(self, drag_widgets):
+        """Returns the widget shown in the layout, where ``drag_widgets`` were
+        dropped, while an asynchronous drop is pending, see
+        :meth:`handle_drag_release`.
+
+        By default it's a :class:`SpacerWidget` with :attr:`spacer_props` and
+        the size of :attr:`spacer_widget`.
+        """
+        placeholder = SpacerWidget(size=self.spacer_widget.size)
+        for key, value in self.spacer_props.items():
+            setattr(placeholder, key, value)
+        return placeholder
+
+    def commit_drop(self, index, drag_widgets, result):
+        """Called when the asynchronous work returned by
+        :meth:`handle_drag_release` or :meth:`handle_drag_release_multiple`
+        succeeded, with the value it returned as ``result``.
+
+        ``index`` is the index in ``children`` where the placeholder was, it
+        was already removed. By default, the widgets are inserted there with
+        :meth:`apply_drop`.
+        """
+        self.apply_drop(index, drag_widgets)
+
+    def rollback_drop(self, drag_widgets, error, drag_origins):
+        """Called, after the placeholder was removed, when the asynchronous
+        work returned by :meth:`handle_drag_release` or
+        :meth:`handle_drag_release_multiple` failed or was cancelled.
+        ``error`` is the raised exception and ``drag_origins`` is the
+        :attr:`DragSession.drag_origins` of ``drag_widgets``.
+
+        By default the error is logged and the widgets that weren't added
+        elsewhere in the meantime are returned to where they were dragged
+        from.
+        """
+        Logger.error(
+            'DraggableLayoutBehavior: drop into {} failed: {!r}'.format(
+                self, error))
+
+        # in the order of their original index, so each lands at its index
+        origins = sorted(
+            (origin for origin in drag_origins if origin[1] is not None),
+            key=itemgetter(2))
+        for widget, parent, index in origins:
+            if widget.parent is None:
+                parent.add_widget(widget, min(index, len(parent.children)))
+
+    def _start_async_drop(self, index, drag_widgets, work):
         spacer = self.spacer_widget
+        if spacer.parent is self:
+            self.remove_widget(spacer)
+
+        placeholder = self.create_drop_placeholder(drag_widgets)
+        self.add_widget(placeholder, index)
+        self.pending_drops.append(placeholder)
+        origins = [
+            origin for origin in self._drag_origins or ()
+            if origin[0] in drag_widgets]
+
+        future = run_drop_work(work)
+        # the future may complete in another thread, so finish on the next
+        # frame, in the kivy thread
+        future.add_done_callback(lambda future: Clock.schedule_once(
+            partial(self._finish_async_drop, placeholder, drag_widgets,
+                    origins, future)))
+
+    def _finish_async_drop(
+            self, placeholder, drag_widgets, drag_origins, future, *largs):
+        self.pending_drops.remove(placeholder)
+        index = self.get_child_index(placeholder)
+        self.remove_widget(placeholder)
+
+        try:
+            result = future.result()
+        except BaseException as e:
+            self.rollback_drop(drag_widgets, e, drag_origins)
+            return
+        self.commit_drop(index, drag_widgets, result)
+
+    def _is_controller_drag(self, touch):
+        controller = self.drop_controller
+        return controller is not None and \
+            touch.ud.get('drag_controller') is controller
+
+    def on_touch_move(self, touch):
+        if self._is_controller_drag(touch):
+            return super(DraggableLayoutBehavior, self).on_touch_move(touch)
+
+        stats = touch.ud.get('drag_stats')
         if touch.grab_current is not self:
             if not touch.ud.get(self._touch_uid()):
                 # we haven't dealt with this before
+                if stats is not None:
+                    stats.layouts_visited += 1
                 if self.collide_point(*touch.pos) and \
-                        touch.ud.get('drag_cls') in self.drag_classes:
+                        self.accepts_drag_cls(touch.ud.get('drag_cls')):
                     if super(DraggableLayoutBehavior, self).on_touch_move(
                             touch):
                         return True
                     touch.grab(self)
                     touch.ud[self._touch_uid()] = True
+                    self.dispatch('on_drag_enter', touch.ud['drag_widget'])
                     x, y = touch.pos
                 else:
                     return super(DraggableLayoutBehavior, self).on_touch_move(
@@ -612,43 +2713,43 @@ class DraggableLayoutBehavior(object):
                 # we have dealt with this touch before, do it when grab_current
                 return True
         else:
+            if stats is not None:
+                stats.layouts_visited += 1
             x, y = touch.pos
-            if touch.ud.get('drag_cls') not in self.drag_classes or \
-                    not collide_parent_tree(self, x, y):
+            if not self.accepts_drag_cls(touch.ud.get('drag_cls')) or \
+                    not self.collide_drag_clip(x, y):
                 touch.ungrab(self)
                 del touch.ud[self._touch_uid()]
-                if spacer.parent:
-                    self.remove_widget(spacer)
+                self._drop_target_leave(touch.ud['drag_widget'])
                 return False
             if super(DraggableLayoutBehavior, self).on_touch_move(touch):
                 touch.ungrab(self)
                 del touch.ud[self._touch_uid()]
-                if spacer.parent:
-                    self.remove_widget(spacer)
+                self._drop_target_leave(touch.ud['drag_widget'])
                 return True
 
-        if self.drag_append_end:
-            if not spacer.parent:
-                self.add_widget(spacer)
+        self._drag_stats = stats
+        controller = touch.ud.get('drag_controller')
+        if controller is not None and controller.coalesce_moves:
+            self._pending_drag_pos = x, y
+            if self._trigger_drag_move is None:
+                self._trigger_drag_move = Clock.create_trigger(
+                    self._process_pending_drag_move, -1)
+            self._trigger_drag_move()
             return True
 
-        j = self.get_drop_insertion_index_move(x, y)
-        if j is not None:
-            if spacer.parent:
-                i = self.children.index(spacer)
-                self.remove_widget(spacer)
-                if i < j:
-                    j -= 1
-            self.add_widget(spacer, index=j)
+        self._process_drag_move(x, y)
         return True
 
     def on_touch_up(self, touch):
-        spacer = self.spacer_widget
+        if self._is_controller_drag(touch):
+            return super(DraggableLayoutBehavior, self).on_touch_up(touch)
+
         if touch.grab_current is not self:
             if not touch.ud.get(self._touch_uid()):
                 # we haven't dealt with this before
                 if self.collide_point(*touch.pos) and \
-                        touch.ud.get('drag_cls') in self.drag_classes:
+                        self.accepts_drag_cls(touch.ud.get('drag_cls')):
                     if super(DraggableLayoutBehavior, self).on_touch_up(touch):
                         return True
                     x, y = touch.pos
@@ -662,35 +2763,112 @@ class DraggableLayoutBehavior(object):
             touch.ungrab(self)
             del touch.ud[self._touch_uid()]
             x, y = touch.pos
-            if touch.ud.get('drag_cls') not in self.drag_classes or \
-                    not collide_parent_tree(self, x, y):
-                if spacer.parent:
-                    self.remove_widget(spacer)
+            if not self.accepts_drag_cls(touch.ud.get('drag_cls')) or \
+                    not self.collide_drag_clip(x, y):
+                self._drop_target_leave(touch.ud['drag_widget'])
                 return False
             if super(DraggableLayoutBehavior, self).on_touch_up(touch):
-                if spacer.parent:
-                    self.remove_widget(spacer)
+                self._drop_target_leave(touch.ud['drag_widget'])
                 return True
 
-        if self.drag_append_end:
-            if spacer.parent:
-                self.remove_widget(spacer)
-            self.handle_drag_release(0, touch.ud['drag_widget'])
+            self._drag_stats = touch.ud.get('drag_stats')
+            self._drag_origins = touch.ud.get('drag_origins')
+            self._process_drag_drop(
+                x, y, touch.ud['drag_widget'], touch.ud.get('drag_widgets'))
+            self.dispatch('on_drag_leave', touch.ud['drag_widget'])
             return True
 
-        self.handle_drag_release(
-            self.get_drop_insertion_index_up(x, y), touch.ud['drag_widget'])
+        self._drag_stats = touch.ud.get('drag_stats')
+        self._drag_origins = touch.ud.get('drag_origins')
+        self._process_drag_drop(
+            x, y, touch.ud['drag_widget'], touch.ud.get('drag_widgets'))
         return True
 
 
 class DraggableBoxLayoutBehavior(DraggableLayoutBehavior):
+    """A :class:`DraggableLayoutBehavior` for a
+    :class:`~kivy.uix.boxlayout.BoxLayout`.
+
+    The children are indexed by their position along the layout's orientation
+    whenever the layout changes, so :meth:`get_widget_under_drag` finds the
+    child under the mouse by bisection rather than testing every child.
+    """
+
+    def do_layout(self, *largs):
+        super(DraggableBoxLayoutBehavior, self).do_layout(*largs)
+        self._drag_hit_index = None
+
+    def move_spacer(self, index):
+        # if the layout is up to date, only the children between the old and
+        # new position of the spacer move, so we skip the full layout
+        spacer = self.spacer_widget
+        trigger = self._trigger_layout
+        if spacer.parent is not self or trigger.is_triggered:
+            super(DraggableBoxLayoutBehavior, self).move_spacer(index)
+            return
+
+        i = self.get_child_index(spacer)
+        j = index - 1 if i < index else index
+        if i == j:
+            return
+
+        low, high = min(i, j), max(i, j)
+        vertical = self.orientation == 'vertical'
+        children = self.children
+        # the children are laid out bottom to top or right to left
+        start = children[low].y if vertical else children[high].x
+        super(DraggableBoxLayoutBehavior, self).move_spacer(index)
+        trigger.cancel()
+
+        spacing = self.spacing
+        if vertical:
+            for widget in children[low:high + 1]:
+                widget.y = start
+                start += widget.height + spacing
+        else:
+            for widget in children[low:high + 1][::-1]:
+                widget.x = start
+                start += widget.width + spacing
+
     def compare_pos_to_widget(self, widget, pos):
         if self.orientation == 'vertical':
             return 'before' if pos[1] >= widget.center_y else 'after'
         return 'before' if pos[0] < widget.center_x else 'after'
 
+    def get_widget_under_drag(self, x, y):
+        vertical = self.orientation == 'vertical'
+        index = self._drag_hit_index
+        if index is None:
+            if vertical:
+                widgets = sorted(self.children, key=attrgetter('y'))
+                coords = [widget.y for widget in widgets]
+            else:
+                widgets = sorted(self.children, key=attrgetter('x'))
+                coords = [widget.x for widget in widgets]
+            index = self._drag_hit_index = coords, widgets
+
+        coords, widgets = index
+        i = bisect_right(coords, y if vertical else x) - 1
+        # a pos on the shared edge of two children may belong to either
+        for widget in widgets[max(i - 1, 0):i + 1][::-1]:
+            if widget.collide_point(x, y):
+                return widget
+        return None
+
 
 class DraggableGridLayoutBehavior(DraggableLayoutBehavior):
+    """A :class:`DraggableLayoutBehavior` for a
+    :class:`~kivy.uix.gridlayout.GridLayout`.
+
+    The children are indexed by their row and column whenever the layout
+    changes, so :meth:`get_widget_under_drag` computes the cell under the
+    mouse from the grid's geometry rather than testing every child.
+    """
+
+    def do_layout(self, *largs):
+        super(DraggableGridLayoutBehavior, self).do_layout(*largs)
+        self._drag_hit_index = None
+
     def compare_pos_to_widget(self, widget, pos):
         x, y = pos
         if y > widget.top:
@@ -703,18 +2881,252 @@ class DraggableGridLayoutBehavior(DraggableLayoutBehavior):
             return 'before'
         else:
             spacer = self.spacer_widget
-            if widget.parent is spacer.parent:
-                children = widget.parent.children
-                if children.index(spacer) > children.index(widget):
+            if widget.parent is self and spacer.parent is self:
+                get_child_index = self.get_child_index
+                if get_child_index(spacer) > get_child_index(widget):
                     return 'after'
         return 'before'
 
+    def get_widget_under_drag(self, x, y):
+        index = self._drag_hit_index
+        if index is None:
+            # children in the same column/row share the x/y of their cell
+            cells = {}
+            for widget in reversed(self.children):
+                cells[widget.pos[0], widget.pos[1]] = widget
+            cols = sorted({pos[0] for pos in cells})
+            rows = sorted({pos[1] for pos in cells})
+            index = self._drag_hit_index = cols, rows, cells
+
+        cols, rows, cells = index
+        i = bisect_right(cols, x) - 1
+        j = bisect_right(rows, y) - 1
+        if i < 0 or j < 0:
+            return None
+
+        widget = cells.get((cols[i], rows[j]))
+        if widget is not None and widget.collide_point(x, y):
+            return widget
+        return None
+
+
+class DraggableRecycleBoxLayoutBehavior(DraggableLayoutBehavior):
+    """A :class:`DraggableLayoutBehavior` for a
+    :class:`~kivy.uix.recycleboxlayout.RecycleBoxLayout`, to reorder the
+    items of a :class:`~kivy.uix.recycleview.RecycleView` by dragging.
+
+    Unlike the other layouts, the insertion index is an index into the
+    ``data`` of the :class:`~kivy.uix.recycleview.RecycleView`, rather than
+    into ``children``, because only the visible items have a widget. It's
+    computed by bisection from the items' geometry, and the spacer is not
+    added to the layout, but drawn as a gap of :attr:`drop_gap_size` between
+    the items, so the views and the data are not touched until the drop and
+    the cost of a move doesn't depend on the number of items.
+
+    By default, :meth:`handle_drag_release` moves the dropped item, when it
+    comes from this layout, to the insertion index with :meth:`move_data`.
+    Items dropped from elsewhere are ignored, it must be overwritten to e.g.
+    insert their data. The viewclass's
+    :meth:`~DraggableObjectBehavior.initiate_drag` must not remove the view
+    from the layout, since the layout owns its views.
+
+    :attr:`drag_append_end` appends to the end of ``data`` and
+    :attr:`batch_drop` is ignored, since the data is moved in one go anyway.
+    Asynchronous drops are not supported, since the placeholder would be
+    added to the layout's views.
+    """
+
+    drop_gap_size = NumericProperty('4dp')
+    """The thickness of the gap that shows where the dragged item would be
+    dropped. The :attr:`spacer_widget` is drawn with this thickness and the
+    width, or height, of the layout, between the items.
+    """
+
+    _drop_gap_index = None
+
+    _drag_data_indices = None
+
+    def __init__(self, **kwargs):
+        self._drag_data_indices = WeakKeyDictionary()
+        super(DraggableRecycleBoxLayoutBehavior, self).__init__(**kwargs)
+
+    def get_drag_data_index(self, drag_widget):
+        """Returns the index in ``data`` of the item shown by ``drag_widget``,
+        as it was when the drag started, or None if it's not one of the
+        layout's views.
+
+        The index is recorded when the touch goes down on the view, so it
+        remains correct if the view is recycled for another item while
+        dragging, e.g. because the list scrolled.
+        """
+        index = self._drag_data_indices.get(drag_widget)
+        if index is None:
+            index = self.view_indices.get(drag_widget)
+        return index
+
+    def get_drop_data_index(self, x, y):
+        """Returns the index in ``data`` before which an item dropped at
+        ``(x, y)`` would be inserted, i.e. the number of items that are before
+        the position, in the layout's orientation.
+        """
+        opts = self.view_opts
+        vertical = self.orientation == 'vertical'
+        lo, hi = 0, len(opts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (item_x, item_y), (width, height) = \
+                opts[mid]['pos'], opts[mid]['size']
+            # the first item is at the top, or left, of the layout
+            if vertical:
+                before = y < item_y + height / 2.
+            else:
+                before = x >= item_x + width / 2.
+            if before:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def move_data(self, indices, index):
+        """Moves the items at ``indices`` in ``data`` so they are inserted,
+        in order, before the item that was at ``index``, and returns whether
+        ``data`` changed.
+
+        Only the range of ``data`` between the moved items and ``index`` is
+        replaced, with a single slice assignment, so the
+        :class:`~kivy.uix.recycleview.RecycleView` only refreshes that range.
+        """
+        data = self.recycleview.data
+        indices = sorted(set(indices))
+        if not indices:
+            return False
+
+        lo = min(indices[0], index)
+        hi = max(indices[-1] + 1, index)
+        moving = set(indices)
+        items = [data[i] for i in indices]
+        rest = [data[i] for i in range(lo, hi) if i not in moving]
+        k = index - lo - sum(1 for i in indices if i < index)
+        items = rest[:k] + items + rest[k:]
+
+        current = data[lo:hi]
+        if all(a is b for a, b in zip(items, current)):
+            return False
+        data[lo:hi] = items
+        return True
+
+    def handle_drag_release(self, index, drag_widget):
+        """Moves the item of ``drag_widget`` to ``index`` in ``data`` with
+        :meth:`move_data`, if it's one of the layout's items. ``index`` is an
+        index into ``data``, see :meth:`get_drop_data_index`.
+        """
+        src = self.get_drag_data_index(drag_widget)
+        if src is not None:
+            self.move_data([src], index)
+
+    def handle_drag_release_multiple(self, index, drag_widgets):
+        """Like :meth:`handle_drag_release`, but moves the items of all the
+        ``drag_widgets`` that are the layout's items with a single
+        :meth:`move_data`, in their order in ``data``.
+        """
+        indices = [self.get_drag_data_index(widget) for widget in drag_widgets]
+        self.move_data([i for i in indices if i is not None], index)
+
+    def move_spacer(self, index):
+        """Draws :attr:`spacer_widget` as a gap before the item at ``index``
+        in ``data``, or after the last item if ``index`` is the length of
+        ``data``.
+        """
+        if index == self._drop_gap_index:
+            return
+
+        opts = self.view_opts
+        spacer = self.spacer_widget
+        spacing = self.spacing
+        size = self.drop_gap_size
+        self._count_spacer_move()
+
+        if self.orientation == 'vertical':
+            if not opts:
+                y = self.top
+            elif index < len(opts):
+                y = opts[index]['pos'][1] + opts[index]['size'][1] + \
+                    spacing / 2.
+            else:
+                y = opts[-1]['pos'][1] - spacing / 2.
+            spacer.pos = self.x, y - size / 2.
+            spacer.size = self.width, size
+        else:
+            if not opts:
+                x = self.x
+            elif index < len(opts):
+                x = opts[index]['pos'][0] - spacing / 2.
+            else:
+                x = opts[-1]['pos'][0] + opts[-1]['size'][0] + spacing / 2.
+            spacer.pos = x - size / 2., self.y
+            spacer.size = size, self.height
+
+        if self._drop_gap_index is None:
+            if spacer.parent is not None:
+                spacer.parent.remove_widget(spacer)
+            self.canvas.after.add(spacer.canvas)
+        self._drop_gap_index = index
+
+    def get_drop_insertion_index_move(self, x, y):
+        if self.is_in_drag_dead_zone(x, y):
+            return None
+
+        if self.drag_append_end:
+            index = len(self.view_opts)
+        else:
+            index = self.get_drop_data_index(x, y)
+
+        if index == self._drop_gap_index:
+            return None
+        return index
+
+    def get_drop_insertion_index_up(self, x, y, remove_spacer=True):
+        index = self._drop_gap_index
+        if index is None or not self.is_in_drag_dead_zone(x, y):
+            index = self.get_drop_data_index(x, y)
+        if remove_spacer:
+            self._remove_spacer()
+        return index
+
+    def _get_drop_append_index(self):
+        return len(self.view_opts)
+
+    def _move_drag_spacer(self, x, y):
+        index = self.get_drop_insertion_index_move(x, y)
+        if index is not None:
+            self.move_spacer(index)
+            self._drag_spacer_pos = x, y
+
+    def _remove_spacer(self):
+        super(DraggableRecycleBoxLayoutBehavior, self)._remove_spacer()
+        if self._drop_gap_index is not None:
+            self._drop_gap_index = None
+            self.canvas.after.remove(self.spacer_widget.canvas)
+
+    def on_touch_down(self, touch):
+        # record the data index of the view, in case it's dragged and then
+        # recycled for another item before the drop
+        view_indices = self.view_indices
+        for view in self.children:
+            if view.collide_point(*touch.pos) and view in view_indices:
+                self._drag_data_indices[view] = view_indices[view]
+                break
+        return super(DraggableRecycleBoxLayoutBehavior, self).on_touch_down(
+            touch)
+
 
 Factory.register('DraggableObjectBehavior', DraggableObjectBehavior)
 Factory.register('DraggableController', DraggableController)
 Factory.register('DraggableLayoutBehavior', DraggableLayoutBehavior)
 Factory.register('DraggableBoxLayoutBehavior', DraggableBoxLayoutBehavior)
 Factory.register('DraggableGridLayoutBehavior', DraggableGridLayoutBehavior)
+Factory.register(
+    'DraggableRecycleBoxLayoutBehavior', DraggableRecycleBoxLayoutBehavior)
 
 
 if __name__ == '__main__':
@@ -725,6 +3137,9 @@ if __name__ == '__main__':
     drag_controller = DraggableController()
 
     class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        drop_color = ColorProperty([0, 0, 0, 0])
+
         def handle_drag_release(self, index, drag_widget):
             self.add_widget(drag_widget, index)
 
@@ -742,14 +3157,15 @@ if __name__ == '__main__':
 BoxLayout:
     DraggableBoxLayout:
         drag_classes: ['label']
+        drop_controller: app.drag_controller
         orientation: 'vertical'
         padding: '5dp'
         spacing: '5dp'
+        on_drag_start: self.drop_color = 1, 0, 1, .2
+        on_drag_end: self.drop_color = 0, 0, 0, 0
         canvas:
             Color:
-                rgba: (1, 0, 1, .2) if \
-app.drag_controller.dragging and app.drag_controller.widget_dragged and \
-app.drag_controller.widget_dragged.drag_cls == 'label' else (0, 0, 0, 0)
+                rgba: self.drop_color
             Rectangle:
                 pos: self.pos
                 size: self.size
@@ -769,13 +3185,14 @@ app.drag_controller.widget_dragged.drag_cls == 'label' else (0, 0, 0, 0)
             padding: '20dp', 0
             spacing: '5dp'
             drag_classes: ['label2']
+            drop_controller: app.drag_controller
             orientation: 'vertical'
             size_hint_y: 2.5
+            on_drag_start: self.drop_color = 1, 1, 0, .2
+            on_drag_end: self.drop_color = 0, 0, 0, 0
             canvas:
                 Color:
-                    rgba: (1, 1, 0, .2) if \
-app.drag_controller.dragging and app.drag_controller.widget_dragged and \
-app.drag_controller.widget_dragged.drag_cls == 'label2' else (0, 0, 0, 0)
+                    rgba: self.drop_color
                 Rectangle:
                     pos: self.pos
                     size: self.size
@@ -787,13 +3204,15 @@ app.drag_controller.widget_dragged.drag_cls == 'label2' else (0, 0, 0, 0)
                 text: 'B3'
     DraggableBoxLayout:
         drag_classes: ['label', 'label2']
+        drop_controller: app.drag_controller
         orientation: 'vertical'
         padding: '5dp'
         spacing: '5dp'
+        on_drag_start: self.drop_color = 0, 1, 1, .2
+        on_drag_end: self.drop_color = 0, 0, 0, 0
         canvas:
             Color:
-                rgba: (0, 1, 1, .2) \
-if app.drag_controller.dragging else (0, 0, 0, 0)
+                rgba: self.drop_color
             Rectangle:
                 pos: self.pos
                 size: self.size
@@ -0,0 +1,259 @@
+"""
+Drag Recorder
+=============
+
+Records the touches that drag
+:class:`~kivy_garden.drag_n_drop.DraggableObjectBehavior` widgets, so the
+exact gestures can later be replayed into the same widget tree, e.g. to
+reproduce or profile a slow drag.
+
+The :class:`DragRecorder` listens to all the touches dispatched by the
+window, but only keeps those that turned into a drag. The touches are saved
+with their time and position relative to the window size, in a compact JSON
+file. :class:`DragReplayer` loads such a file and dispatches the touches again
+through the event loop, either paced as they were recorded, or as fast as
+possible::
+
+    recorder = DragRecorder()
+    recorder.start()
+    ...
+    recorder.stop()
+    recorder.save('drags.json')
+
+and later, e.g. in a headless test or profiling script, once the same widget
+tree was created::
+
+    replayer = DragReplayer.load('drags.json')
+    replayer.run(realtime=False)
+
+:meth:`DragReplayer.run` runs the event loop itself, until all the touches
+were dispatched, so it must not be called from within a running app.
+"""
+import json
+from time import perf_counter
+
+from kivy.input.motionevent import MotionEvent
+
+__all__ = ('DragRecorder', 'DragReplayer', 'ReplayTouch')
+
+_event_kinds = ('begin', 'update', 'end')
+
+
+class DragRecorder(object):
+    """Records the touches that drag a
+    :class:`~kivy_garden.drag_n_drop.DraggableObjectBehavior`.
+
+    Each recorded event is a list of ``[time, kind, touch_id, sx, sy]``, where
+    ``kind`` is ``0``, ``1`` or ``2`` for the touch down, move and up,
+    respectively, and ``sx, sy`` is the position relative to the window size.
+    The touch down event also has the mouse button, if any.
+    """
+
+    controller = None
+    """If not None, only drags managed by this
+    :class:`~kivy_garden.drag_n_drop.DraggableController` are recorded.
+    """
+
+    window = None
+    """The window whose touches are recorded. Defaults to the Kivy window.
+    """
+
+    events = []
+    """The events recorded so far, ordered by time.
+    """
+
+    recording = False
+    """Whether the recorder is currently recording.
+    """
+
+    _start_time = 0
+
+    _touches = {}
+
+    _touch_count = 0
+
+    def __init__(self, controller=None, window=None):
+        super(DragRecorder, self).__init__()
+        self.controller = controller
+        self.window = window
+        self.events = []
+        self._touches = {}
+
+    def start(self):
+        """Starts recording, after any events already recorded.
+        """
+        if self.recording:
+            return
+
+        if self.window is None:
+            from kivy.core.window import Window
+            self.window = Window
+
+        offset = self.events[-1][0] if self.events else 0
+        self._start_time = perf_counter() - offset
+        self._touches = {}
+        self.recording = True
+        self.window.fbind('on_motion', self._record_motion)
+
+    def stop(self):
+        """Stops recording. Touches that are still in progress are dropped.
+        """
+        if not self.recording:
+            return
+
+        self.recording = False
+        self.window.funbind('on_motion', self._record_motion)
+        self._touches = {}
+
+    def clear(self):
+        """Removes all the recorded events.
+        """
+        self.events = []
+        self._touch_count = 0
+        self._touches = {}
+
+    def _record_motion(self, window, etype, me):
+        if not me.is_touch or etype not in _event_kinds:
+            return
+
+        kind = _event_kinds.index(etype)
+        t = round(perf_counter() - self._start_time, 6)
+        sx, sy = round(me.sx, 6), round(me.sy, 6)
+        if kind == 0:
+            button = me.button if 'button' in me.profile else None
+            self._touches[me.uid] = [[t, kind, None, sx, sy, button]]
+            return
+
+        events = self._touches.get(me.uid)
+        if events is None:
+            return
+        events.append([t, kind, None, sx, sy])
+        if kind != 2:
+            return
+
+        del self._touches[me.uid]
+        controller = me.ud.get('drag_controller')
+        if controller is None or self.controller is not None and \
+                controller is not self.controller:
+            return
+
+        touch_id = self._touch_count
+        self._touch_count += 1
+        for event in events:
+            event[2] = touch_id
+            if event[-1] is None:
+                del event[-1]
+
+        self.events.extend(events)
+        self.events.sort(key=lambda event: event[0])
+
+    def to_dict(self):
+        """Returns the recording as a dict that can be serialized to JSON and
+        passed to :class:`DragReplayer`.
+        """
+        window = self.window
+        size = list(window.size) if window is not None else None
+        return {'version': 1, 'window_size': size, 'events': self.events}
+
+    def save(self, filename):
+        """Saves the recorded events to ``filename`` as JSON.
+        """
+        with open(filename, 'w') as fh:
+            json.dump(self.to_dict(), fh, separators=(',', ':'))
+
+
+class ReplayTouch(MotionEvent):
+    """The touch dispatched by :class:`DragReplayer` for each recorded touch.
+    """
+
+    def __init__(self, touch_id, sx, sy, button=None):
+        args = {'sx': sx, 'sy': sy, 'button': button}
+        super(ReplayTouch, self).__init__(
+            'drag_replay', touch_id, args, is_touch=True, type_id='touch')
+
+    def depack(self, args):
+        self.sx = args['sx']
+        self.sy = args['sy']
+        self.profile = ['pos']
+        if args.get('button') is not None:
+            self.button = args['button']
+            self.profile.append('button')
+        super(ReplayTouch, self).depack(args)
+
+
+class DragReplayer(object):
+    """Dispatches touches recorded by a :class:`DragRecorder` through the
+    event loop, as if they came from the window.
+
+    ``recording`` is the dict returned by :meth:`DragRecorder.to_dict`.
+    """
+
+    events = []
+    """The events to replay, as in :attr:`DragRecorder.events`.
+    """
+
+    window_size = None
+    """The size of the window when the events were recorded, if known. The
+    positions are replayed relative to the current window size, so the touches
+    only hit the same widgets if the window has the same size.
+    """
+
+    def __init__(self, recording):
+        super(DragReplayer, self).__init__()
+        self.events = recording['events']
+        self.window_size = recording.get('window_size')
+
+    @classmethod
+    def load(cls, filename):
+        """Returns a :class:`DragReplayer` for the recording saved to
+        ``filename`` with :meth:`DragRecorder.save`.
+        """
+        with open(filename) as fh:
+            return cls(json.load(fh))
+
+    def dispatch_event(self, event, touches):
+        """Dispatches a single recorded event. ``touches`` maps the recorded
+        touch ids to the :class:`ReplayTouch` of the touches in progress.
+        """
+        from kivy.base import EventLoop
+
+        _, kind, touch_id, sx, sy = event[:5]
+        if kind == 0:
+            button = event[5] if len(event) > 5 else None
+            touch = touches[touch_id] = ReplayTouch(touch_id, sx, sy, button)
+        else:
+            touch = touches.get(touch_id)
+            if touch is None:
+                return
+            button = touch.button if 'button' in touch.profile else None
+            touch.move({'sx': sx, 'sy': sy, 'button': button})
+            if kind == 2:
+                del touches[touch_id]
+
+        EventLoop.post_dispatch_input(_event_kinds[kind], touch)
+
+    def run(self, realtime=True, idle=True):
+        """Replays all the events and returns once they were dispatched.
+
+        If ``realtime``, the events are dispatched with the timing they were
+        recorded with, otherwise they are dispatched as fast as possible. If
+        ``idle``, a frame of the event loop is processed after each event, so
+        that what the widgets scheduled for the next frame runs as it would
+        have when recorded.
+        """
+        from kivy.base import EventLoop
+
+        events = self.events
+        if not events:
+            return
+
+        touches = {}
+        start = perf_counter() - events[0][0]
+        for event in events:
+            if realtime:
+                while perf_counter() - start < event[0]:
+                    EventLoop.idle()
+
+            self.dispatch_event(event, touches)
+            if idle:
+                EventLoop.idle()
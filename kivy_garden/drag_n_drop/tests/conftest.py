@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def kivy_window():
+    from kivy.base import EventLoop
+    EventLoop.ensure_window()
+    window = EventLoop.window
+    existing = list(window.children)
+
+    yield window
+
+    for child in window.children[:]:
+        if child not in existing:
+            window.remove_widget(child)
+    EventLoop.idle()
@@ -0,0 +1,411 @@
+"""Benchmarks of the drag and drop hot paths.
+
+These drive synthetic touches through trees of draggable widgets and layouts
+and print the latency percentiles of the measured calls, run them with
+``pytest -s`` to see the numbers. They only assert the drag results, so they
+also run on CI, where Kivy uses an Xvfb or offscreen window.
+"""
+import time
+import statistics
+import pytest
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Returns the nearest rank percentiles of ``values``.
+    """
+    values = sorted(values)
+    n = len(values)
+    return [values[min(n - 1, max(0, int(round(p / 100. * n)) - 1))]
+            for p in points]
+
+
+def report(name, values):
+    p50, p90, p99 = percentiles(values)
+    print('{}: n={} p50={:.1f}us p90={:.1f}us p99={:.1f}us max={:.1f}us'.format(
+        name, len(values), p50 * 1e6, p90 * 1e6, p99 * 1e6,
+        max(values) * 1e6))
+
+
+def make_bench_tree(
+        window, controller, layout='box', children=10, depth=0, layouts=1,
+        register=False):
+    """Creates ``layouts`` drag layouts side by side, each nested ``depth``
+    box layouts deep and containing ``children`` draggable labels.
+    """
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.gridlayout import GridLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableGridLayoutBehavior, DraggableObjectBehavior
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            self.add_widget(drag_widget, index)
+
+    class DraggableGridLayout(DraggableGridLayoutBehavior, GridLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            self.add_widget(drag_widget, index)
+
+    class DragLabel(DraggableObjectBehavior, Label):
+
+        def initiate_drag(self):
+            self.parent.remove_widget(self)
+
+    root = BoxLayout()
+    targets = []
+    for _ in range(layouts):
+        if layout == 'grid':
+            target = DraggableGridLayout(drag_classes=['label'], cols=4)
+        else:
+            target = DraggableBoxLayout(
+                drag_classes=['label'], orientation='vertical')
+
+        parent = root
+        for _ in range(depth):
+            box = BoxLayout()
+            parent.add_widget(box)
+            parent = box
+        parent.add_widget(target)
+
+        for i in range(children):
+            target.add_widget(DragLabel(
+                text=str(i), drag_cls='label', drag_controller=controller))
+        if register:
+            target.drop_controller = controller
+        targets.append(target)
+
+    window.add_widget(root)
+    EventLoop.idle()
+    return root, targets
+
+
+def drag_latencies(widget, points):
+    """Drags ``widget`` through ``points`` and returns the duration of each
+    touch move. The frames are processed between moves, but not timed.
+    """
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+
+    touch = UnitTestTouch(*widget.center)
+    touch.touch_down()
+    times = []
+    for x, y in points:
+        ts = time.perf_counter()
+        touch.touch_move(x, y)
+        times.append(time.perf_counter() - ts)
+        EventLoop.idle()
+
+    ts = time.perf_counter()
+    touch.touch_up()
+    times.append(time.perf_counter() - ts)
+    EventLoop.idle()
+    return times
+
+
+def sweep_points(root, widget, count=40):
+    """Points going from ``widget`` across the full width of ``root`` and
+    zig-zagging over its height.
+    """
+    x0, y0 = widget.center
+    points = [(x0 + 10, y0), (x0 + 20, y0)]
+    for i in range(count):
+        x = root.x + (i + .5) * root.width / count
+        y = root.y + (.1 + .8 * (i % 5) / 4.) * root.height
+        points.append((x, y))
+    return points
+
+
+def assert_dropped(targets, children, layouts):
+    from kivy_garden.drag_n_drop import SpacerWidget
+
+    assert sum(len(target.children) for target in targets) == \
+        children * layouts
+    for target in targets:
+        assert not any(
+            isinstance(child, SpacerWidget) for child in target.children)
+
+
+@pytest.mark.parametrize('layout', ['box', 'grid'])
+@pytest.mark.parametrize('children', [10, 200])
+def test_move_latency_vs_children(kivy_window, layout, children):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, targets = make_bench_tree(
+        kivy_window, controller, layout=layout, children=children)
+    widget = targets[0].children[0]
+    times = drag_latencies(widget, sweep_points(root, widget))
+
+    report('{} children={}'.format(layout, children), times)
+    assert_dropped(targets, children, 1)
+
+
+@pytest.mark.parametrize('depth', [0, 8])
+def test_move_latency_vs_depth(kivy_window, depth):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, targets = make_bench_tree(
+        kivy_window, controller, children=20, depth=depth, layouts=2)
+    widget = targets[0].children[0]
+    times = drag_latencies(widget, sweep_points(root, widget))
+
+    report('depth={}'.format(depth), times)
+    assert_dropped(targets, 20, 2)
+
+
+@pytest.mark.parametrize('register', [False, True])
+@pytest.mark.parametrize('layouts', [1, 8])
+def test_move_latency_vs_drop_layouts(kivy_window, layouts, register):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, targets = make_bench_tree(
+        kivy_window, controller, children=10, layouts=layouts,
+        register=register)
+    widget = targets[0].children[0]
+    times = drag_latencies(widget, sweep_points(root, widget))
+
+    report('layouts={} registered={}'.format(layouts, register), times)
+    assert_dropped(targets, 10, layouts)
+
+
+@pytest.mark.parametrize('layout', ['box', 'grid'])
+@pytest.mark.parametrize('children', [10, 200])
+def test_insertion_index_latency(kivy_window, layout, children):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, targets = make_bench_tree(
+        kivy_window, controller, layout=layout, children=children)
+    target = targets[0]
+
+    times = []
+    for x, y in sweep_points(root, target.children[0]):
+        ts = time.perf_counter()
+        target.get_drop_insertion_index_move(x, y)
+        times.append(time.perf_counter() - ts)
+    target._remove_spacer()
+
+    report('insertion index {} children={}'.format(layout, children), times)
+    assert_dropped(targets, children, 1)
+
+
+@pytest.mark.parametrize('items', [100, 10000])
+def test_recycle_insertion_index_latency(kivy_window, items):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.recycleview import RecycleView
+    from kivy.uix.recycleboxlayout import RecycleBoxLayout
+    from kivy_garden.drag_n_drop import DraggableRecycleBoxLayoutBehavior
+
+    class DraggableRecycleBoxLayout(
+            DraggableRecycleBoxLayoutBehavior, RecycleBoxLayout):
+        pass
+
+    layout = DraggableRecycleBoxLayout(
+        drag_classes=['label'], orientation='vertical', size_hint_y=None,
+        default_size=(None, 30), default_size_hint=(1, None))
+    layout.bind(minimum_height=layout.setter('height'))
+    rv = RecycleView()
+    rv.add_widget(layout)
+    rv.viewclass = Label
+    rv.data = [{'text': str(i)} for i in range(items)]
+    kivy_window.add_widget(rv)
+    EventLoop.idle()
+
+    times = []
+    step = layout.height / 200.
+    for i in range(200):
+        ts = time.perf_counter()
+        index = layout.get_drop_insertion_index_move(0, layout.top - i * step)
+        if index is not None:
+            layout.move_spacer(index)
+        times.append(time.perf_counter() - ts)
+    layout._remove_spacer()
+    kivy_window.remove_widget(rv)
+
+    report('recycle insertion index items={}'.format(items), times)
+    assert len(layout.children) < 50
+
+
+@pytest.mark.parametrize('mode', ['pixels', 'texture', 'live'])
+@pytest.mark.parametrize('size', [(20, 20), (200, 200), (800, 600)])
+def test_capture_time_vs_widget_size(kivy_window, mode, size):
+    from kivy.uix.label import Label
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_mode=mode)
+    widget = Label(text='A', size_hint=(None, None), size=size)
+    kivy_window.add_widget(widget)
+
+    times = []
+    for _ in range(10):
+        ts = time.perf_counter()
+        controller.prepare_preview_widget(widget)
+        times.append(time.perf_counter() - ts)
+        controller.clean_dragging()
+
+    report('capture {} {}x{}'.format(mode, *size), times)
+    if mode == 'live':
+        # nothing is rendered
+        assert controller.preview_pool.misses == 0
+        return
+    assert controller.preview_pool.misses == 1
+    assert controller.preview_pool.hits == len(times) - 1
+
+
+def tap_latencies(window, controller, size, count=20):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy.uix.label import Label
+    from kivy_garden.drag_n_drop import DraggableObjectBehavior
+
+    class DragLabel(DraggableObjectBehavior, Label):
+        pass
+
+    widget = DragLabel(
+        text='A', size_hint=(None, None), size=size,
+        drag_controller=controller, drag_cls='label')
+    window.add_widget(widget)
+    EventLoop.idle()
+
+    times = []
+    for _ in range(count):
+        touch = UnitTestTouch(*widget.center)
+        ts = time.perf_counter()
+        touch.touch_down()
+        touch.touch_up()
+        times.append(time.perf_counter() - ts)
+
+    window.remove_widget(widget)
+    return times
+
+
+@pytest.mark.parametrize('lazy', [True, False])
+def test_tap_latency_vs_widget_size(kivy_window, lazy):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    captures = []
+
+    class Controller(DraggableController):
+        def prepare_preview_widget(self, source_widget):
+            captures.append(source_widget)
+            return super(Controller, self).prepare_preview_widget(
+                source_widget)
+
+    controller = Controller(lazy_preview_capture=lazy)
+    pool = controller.preview_pool
+    renders = []
+    acquire = pool.acquire
+
+    def count_acquire(size, with_texture=True):
+        renders.append(size)
+        return acquire(size, with_texture)
+    pool.acquire = count_acquire
+
+    small = tap_latencies(kivy_window, controller, (20, 20))
+    large = tap_latencies(kivy_window, controller, (800, 600))
+
+    print('lazy={}: tap median small={:.6f}s large={:.6f}s'.format(
+        lazy, statistics.median(small), statistics.median(large)))
+
+    if lazy:
+        # nothing is rendered on a tap, so its cost doesn't scale with size
+        assert not captures
+        assert not renders
+        assert not pool.misses
+    else:
+        assert len(captures) == len(small) + len(large)
+        assert len(renders) == len(small) + len(large)
+
+
+def touched_memory(window, count, use_default_controller):
+    """Taps ``count`` draggable widgets once each and returns the number of
+    bytes allocated by the taps that are still held afterwards, and the
+    controllers of the widgets.
+    """
+    import gc
+    import tracemalloc
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy.uix.widget import Widget
+    from kivy.uix.gridlayout import GridLayout
+    from kivy_garden.drag_n_drop import DraggableObjectBehavior
+
+    class DragWidget(DraggableObjectBehavior, Widget):
+        pass
+
+    DragWidget.use_default_controller = use_default_controller
+    root = GridLayout(cols=20)
+    # all the same size, so the previews fit the same pooled buffers
+    widgets = [
+        DragWidget(drag_cls='item', size_hint=(None, None), size=(30, 30))
+        for _ in range(count)]
+    for widget in widgets:
+        root.add_widget(widget)
+    window.add_widget(root)
+    EventLoop.idle()
+    # widget properties are only stored once read, read those used by a tap
+    # before measuring so only the memory held by the controllers is counted
+    for widget in widgets:
+        widget.collide_point(*widget.to_window(*widget.center))
+        widget.disabled, widget.drag_widget, widget.drag_controller
+        widget.proxy_ref
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for widget in widgets:
+        touch = UnitTestTouch(*widget.to_window(*widget.center))
+        touch.touch_down()
+        touch.touch_up()
+    del touch
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    window.remove_widget(root)
+    return used, {widget.drag_controller for widget in widgets}
+
+
+def controller_state(controller):
+    """Returns the sizes of what a controller keeps between drags.
+    """
+    pool = controller.preview_pool
+    return {
+        'sessions': len(controller.sessions),
+        'preview_widgets': len(controller._preview_widgets),
+        'cached_previews': len(controller._preview_cache),
+        'pool_buffers': len(pool._lru),
+        'pool_bytes': pool.total_bytes,
+    }
+
+
+def test_memory_vs_touched_widgets(kivy_window):
+    from kivy_garden.drag_n_drop import get_default_drag_controller
+
+    # the shared controller is created by the first tap, don't count it
+    touched_memory(kivy_window, 1, True)
+    controller = get_default_drag_controller()
+    own, shared, states = {}, {}, {}
+    for count in (50, 200):
+        own[count], controllers = touched_memory(kivy_window, count, False)
+        assert len(controllers) == count
+        assert all(
+            controller_state(c)['pool_buffers'] == 1 for c in controllers)
+        shared[count], controllers = touched_memory(kivy_window, count, True)
+        assert controllers == {controller}
+        states[count] = controller_state(controller)
+
+        print('touched={}: own controllers={:.1f}KB shared controller='
+              '{:.1f}KB'.format(count, own[count] / 1024.,
+                                shared[count] / 1024.))
+
+    # each widget holds its own controller and preview buffer, but what the
+    # shared controller holds doesn't grow with the number of widgets touched
+    assert states[50] == states[200]
+    assert states[200]['sessions'] == 0
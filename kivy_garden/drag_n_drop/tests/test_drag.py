@@ -0,0 +1,1144 @@
+import pytest
+
+
+def make_tree(window, controller, n=4, orientation='vertical'):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableObjectBehavior
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            self.add_widget(drag_widget, index)
+
+    class DragLabel(DraggableObjectBehavior, Label):
+
+        def initiate_drag(self):
+            self.parent.remove_widget(self)
+
+    root = BoxLayout()
+    source = DraggableBoxLayout(
+        drag_classes=['label'], orientation=orientation)
+    target = DraggableBoxLayout(
+        drag_classes=['label'], orientation=orientation)
+    root.add_widget(source)
+    root.add_widget(target)
+
+    for i in range(n):
+        source.add_widget(DragLabel(
+            text=str(i), drag_cls='label', drag_controller=controller))
+        target.add_widget(Label(text='t{}'.format(i)))
+
+    window.add_widget(root)
+    EventLoop.idle()
+    return root, source, target
+
+
+def drag(widget, points, idle=True):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+
+    touch = UnitTestTouch(*widget.center)
+    touch.touch_down()
+    for x, y in points:
+        touch.touch_move(x, y)
+        if idle:
+            EventLoop.idle()
+    touch.touch_up()
+    EventLoop.idle()
+    return touch
+
+
+@pytest.mark.parametrize('lazy', [True, False])
+def test_drag_between_layouts(kivy_window, lazy):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(lazy_preview_capture=lazy)
+    root, source, target = make_tree(kivy_window, controller)
+    widget = source.children[-1]
+    x, y = widget.center
+    tx, ty = target.children[-1].center
+
+    drag(widget, [(x + 10, y), (x + 30, y), (tx, ty + 5)])
+
+    assert widget.parent is target
+    assert target.children[-1] is widget
+    assert not controller.dragging
+    assert controller.preview_widget.parent is None
+
+
+@pytest.mark.parametrize('layout', ['vertical', 'horizontal', 'grid'])
+def test_widget_under_drag_index(kivy_window, layout):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.gridlayout import GridLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableGridLayoutBehavior, DraggableLayoutBehavior
+
+    if layout == 'grid':
+        class Layout(DraggableGridLayoutBehavior, GridLayout):
+            pass
+        widget = Layout(cols=7, spacing=3, padding=5)
+    else:
+        class Layout(DraggableBoxLayoutBehavior, BoxLayout):
+            pass
+        widget = Layout(orientation=layout, spacing=3, padding=5)
+
+    for i in range(40):
+        widget.add_widget(Label(text=str(i)))
+    kivy_window.add_widget(widget)
+    EventLoop.idle()
+
+    def linear(x, y):
+        return DraggableLayoutBehavior.get_widget_under_drag(widget, x, y)
+
+    width, height = kivy_window.size
+    for x in range(-3, int(width) + 3, 7):
+        for y in range(-3, int(height) + 3, 7):
+            assert widget.get_widget_under_drag(x, y) is linear(x, y)
+
+    # the index is rebuilt when the children change
+    child = widget.children[5]
+    x, y = child.center
+    widget.remove_widget(child)
+    assert widget.get_widget_under_drag(x, y) is None
+
+
+def test_child_index(kivy_window):
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior
+
+    class Layout(DraggableBoxLayoutBehavior, BoxLayout):
+        pass
+
+    layout = Layout()
+    labels = [Label() for _ in range(5)]
+    for label in labels:
+        layout.add_widget(label)
+    assert layout.get_child_index(labels[0]) == 4
+
+    layout.remove_widget(labels[2])
+    layout.add_widget(labels[2], index=4)
+    for label in labels:
+        assert layout.get_child_index(label) == layout.children.index(label)
+
+
+@pytest.mark.parametrize('orientation', ['vertical', 'horizontal'])
+def test_move_spacer(kivy_window, orientation):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior
+
+    layouts = []
+
+    class Layout(DraggableBoxLayoutBehavior, BoxLayout):
+        def do_layout(self, *largs):
+            layouts.append(self)
+            return super(Layout, self).do_layout(*largs)
+
+    layout = Layout(
+        orientation=orientation, spacing=4, padding=3,
+        spacer_props={'size_hint': (.5, .5)})
+    for i in range(6):
+        layout.add_widget(Label(size_hint=(i + 1, i + 1)))
+    kivy_window.add_widget(layout)
+    spacer = layout.spacer_widget
+
+    for index, final in [(2, 2), (5, 4), (1, 1), (7, 6), (0, 0), (0, 0)]:
+        layout.move_spacer(index)
+        EventLoop.idle()
+        assert layout.children.index(spacer) == final
+
+        positions = [c for widget in layout.children for c in widget.pos]
+        layout.do_layout()
+        assert [c for widget in layout.children for c in widget.pos] == \
+            pytest.approx(positions)
+        assert layout.canvas.indexof(spacer.canvas) != -1
+
+    # moving the spacer when the layout is up to date skips the full layout
+    EventLoop.idle()
+    del layouts[:]
+    layout.move_spacer(4)
+    EventLoop.idle()
+    assert not layouts
+
+
+def test_coalesce_moves(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(coalesce_moves=True)
+    root, source, target = make_tree(kivy_window, controller, n=8)
+    widget = source.children[-1]
+    x, y = widget.center
+
+    processed = []
+    process = target._process_drag_move
+    target._process_drag_move = lambda x, y: (
+        processed.append((x, y)), process(x, y))
+
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    touch.touch_move(x + 40, y)
+    touch.touch_move(x + 80, y)
+    EventLoop.idle()
+    assert widget.parent is None
+    preview_pos = list(controller.preview_widget.pos)
+
+    points = [(target.center_x + i, target.top - i * 10) for i in range(30)]
+    for px, py in points:
+        touch.touch_move(px, py)
+    assert not processed
+    assert list(controller.preview_widget.pos) == preview_pos
+
+    EventLoop.idle()
+    assert processed == [points[-1]]
+    assert controller.preview_widget.x == pytest.approx(
+        controller.get_session(touch).start_widget_pos[0] +
+        points[-1][0] - x)
+
+    # the drop uses the exact touch up position, not the last frame's one
+    target_widget = target.children[-1]
+    touch.touch_move(*target_widget.center)
+    touch.touch_up()
+    EventLoop.idle()
+    assert widget.parent is target
+    assert target.children[-1] is widget
+    assert target.spacer_widget.parent is None
+
+
+@pytest.mark.parametrize('coalesce', [True, False])
+def test_registered_drop_targets(kivy_window, coalesce):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(coalesce_moves=coalesce)
+    root, source, target = make_tree(kivy_window, controller)
+    other_cls = type(target)
+    nested = other_cls(drag_classes=['label'], drop_controller=controller)
+    nested.add_widget(Label(text='n'))
+    other = other_cls(drag_classes=['other'], drop_controller=controller)
+    target.add_widget(nested, index=2)
+    root.add_widget(other)
+    for layout in (source, target):
+        layout.drop_controller = controller
+    EventLoop.idle()
+
+    assert set(controller.get_drop_targets('label')) == {
+        source, target, nested}
+    assert controller.get_drop_targets('other') == [other]
+
+    visited = []
+    for layout in (source, target, nested, other):
+        process = layout._process_drag_move
+        layout._process_drag_move = lambda x, y, layout=layout, p=process: (
+            visited.append(layout), p(x, y))
+
+    widget = source.children[-1]
+    x, y = widget.center
+    drag(widget, [
+        (x + 10, y), (x + 30, y), (other.center_x, other.center_y),
+        nested.center, (target.right - 5, target.top - 5)])
+
+    assert widget.parent is target
+    assert target.children[-1] is widget
+    assert set(visited) == {source, target, nested}
+    assert visited.index(nested) < visited.index(target)
+    assert nested.spacer_widget.parent is None
+    assert target.spacer_widget.parent is None
+    assert not controller.sessions
+
+    nested.drop_controller = None
+    assert set(controller.get_drop_targets('label')) == {source, target}
+
+
+def test_draggable_layout_registration():
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableController, DraggableObjectBehavior
+
+    class Column(DraggableObjectBehavior, DraggableBoxLayoutBehavior,
+                 BoxLayout):
+        pass
+
+    # the controller dragging the column doesn't make it a drop target
+    controller = DraggableController()
+    column = Column(
+        drag_cls='column', drag_classes=['card'], drag_controller=controller)
+    assert column.drag_controller is controller
+    assert not controller.get_drop_targets('card')
+
+    column.drop_controller = controller
+    assert controller.get_drop_targets('card') == [column]
+
+
+def test_drag_classes_patterns(kivy_window):
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableController
+
+    class Layout(DraggableBoxLayoutBehavior, BoxLayout):
+        pass
+
+    controller = DraggableController()
+    layout = Layout(
+        drag_classes=['label', 'card.*', 'chip?'], drop_controller=controller)
+
+    for drag_cls in ('label', 'card.red', 'card.red.small', 'chip1'):
+        assert layout.accepts_drag_cls(drag_cls)
+        assert controller.get_drop_targets(drag_cls) == [layout]
+    for drag_cls in ('card', 'labels', 'chip', None):
+        assert not layout.accepts_drag_cls(drag_cls)
+    assert not controller.get_drop_targets('card')
+
+    layout.drag_classes = ['card']
+    assert layout.accepts_drag_cls('card')
+    assert not layout.accepts_drag_cls('card.red')
+    assert not controller.get_drop_targets('card.red')
+    assert controller.get_drop_targets('card') == [layout]
+
+
+def test_drag_clip_rect(kivy_window):
+    from kivy.base import EventLoop
+    from kivy_garden.drag_n_drop import DraggableController, \
+        get_window_clip_rect
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+
+    rect = target.get_drag_clip_rect()
+    assert rect == get_window_clip_rect(target)
+    assert target.get_drag_clip_rect() is rect
+    assert target.collide_drag_clip(*target.center)
+    assert not target.collide_drag_clip(*source.center)
+
+    # changing an ancestor recomputes the rectangle
+    root.size = root.width / 2., root.height
+    EventLoop.idle()
+    assert target.get_drag_clip_rect() is not rect
+    assert target.get_drag_clip_rect() == get_window_clip_rect(target)
+
+    target._invalidate_drag_clip()
+    assert not target._drag_clip_widgets
+
+
+def test_drag_clip_rotated(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.scatter import Scatter
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableController, DragSession, collide_parent_tree
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+        pass
+
+    controller = DraggableController()
+    scatter = Scatter(
+        size_hint=(None, None), size=(200, 200), pos=(300, 200),
+        rotation=45, do_translation=False, do_rotation=False,
+        do_scale=False)
+    layout = DraggableBoxLayout(
+        size=(200, 200), drag_classes=['label'], drop_controller=controller)
+    scatter.add_widget(layout)
+    kivy_window.add_widget(scatter)
+    EventLoop.idle()
+
+    layout.get_drag_clip_rect()
+    assert not layout._drag_clip_translate_only
+    for x in range(-50, 251, 25):
+        for y in range(-50, 251, 25):
+            assert layout.collide_drag_clip(x, y) == \
+                collide_parent_tree(layout, x, y)
+
+    # the corner of the window bounding box is outside the rotated layout
+    left, bottom, right, top = layout.get_drag_clip_rect()
+    wx, wy = left + 5, bottom + 5
+    assert not collide_parent_tree(layout, *scatter.to_widget(wx, wy))
+
+    session = DragSession()
+    controller._snapshot_drop_targets('label', session)
+    assert session._drop_targets_snapshot == [layout]
+    assert controller.get_drop_target_at(wx, wy, session) is None
+    cx, cy = layout.to_window(*layout.center)
+    assert controller.get_drop_target_at(cx, cy, session) is layout
+    controller._clear_drop_targets_snapshot(session)
+
+    layout._invalidate_drag_clip()
+    assert layout._drag_clip_translate_only
+
+
+@pytest.mark.parametrize('register', [False, True])
+def test_drag_stats(kivy_window, register):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(collect_stats=True)
+    root, source, target = make_tree(kivy_window, controller)
+    if register:
+        source.drop_controller = target.drop_controller = controller
+    dispatched = []
+    controller.fbind('on_drag_stats', lambda c, stats: dispatched.append(
+        stats.as_dict()))
+
+    # a click is not a drag
+    touch = UnitTestTouch(*source.children[0].center)
+    touch.touch_down()
+    touch.touch_up()
+    EventLoop.idle()
+    assert not dispatched
+    assert controller.drag_stats is None
+
+    widget = source.children[-1]
+    x, y = widget.center
+    tx, ty = target.children[-1].center
+    drag(widget, [(x + 10, y), (x + 30, y), (tx, ty + 5), (tx, ty - 5)])
+    assert widget.parent is target
+
+    assert len(dispatched) == 1
+    stats = dispatched[0]
+    assert stats['drags'] == 1
+    assert stats['capture_count'] == 1
+    assert stats['capture_time'] > 0
+    assert stats['move_count'] >= 3
+    assert stats['move_time'] >= stats['max_move_time'] > 0
+    assert stats['layouts_visited'] >= 3
+    assert stats['spacer_moves'] >= 1
+    assert stats['layout_move_time'] > 0
+    assert stats['initiate_drag_time'] > 0
+    assert stats['complete_drag_time'] > 0
+    assert stats['drag_release_time'] > 0
+    assert controller.stats.as_dict() == stats
+
+    drag(target.children[-1], [(tx + 10, ty), (tx + 30, ty)])
+    assert len(dispatched) == 2
+    assert controller.stats.drags == 2
+    controller.stats.reset()
+    assert not any(controller.stats.as_dict().values())
+
+
+def test_concurrent_drags(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+    first, second = source.children[-1], source.children[0]
+    tx, ty = target.children[-1].center
+
+    touches = []
+    for widget in (first, second):
+        touch = UnitTestTouch(*widget.center)
+        touch.touch_down()
+        touches.append(touch)
+    for dx in (10, 30):
+        for touch in touches:
+            touch.touch_move(touch.ox + dx, touch.oy)
+    EventLoop.idle()
+
+    sessions = [controller.get_session(touch) for touch in touches]
+    assert [s.widget_dragged for s in sessions] == [first, second]
+    assert all(s.dragging for s in sessions)
+    previews = [s.preview_widget for s in sessions]
+    assert previews[0] is not previews[1]
+    assert all(preview.parent is kivy_window for preview in previews)
+    assert previews[0].x == pytest.approx(
+        sessions[0].start_widget_pos[0] + 30)
+    assert controller.widget_dragged is second
+    assert controller.start_widget_pos == sessions[1].start_widget_pos
+    assert controller.touch_dx == sessions[1].touch_dx
+    assert controller.touch_dy == sessions[1].touch_dy
+
+    touches[0].touch_move(tx, ty + 5)
+    touches[0].touch_up()
+    EventLoop.idle()
+    assert first.parent is target
+    assert previews[0].parent is None
+    assert controller.dragging
+    assert controller.widget_dragged is second
+    assert previews[1].parent is kivy_window
+
+    touches[1].touch_move(tx, ty + 5)
+    touches[1].touch_up()
+    EventLoop.idle()
+    assert second.parent is target
+    assert previews[1].parent is None
+    assert not controller.dragging
+    assert controller.widget_dragged is None
+    assert not controller.sessions
+
+
+def test_controller_session_attributes(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    class Controller(DraggableController):
+
+        def prepare_preview_widget(self, source_widget):
+            super(Controller, self).prepare_preview_widget(source_widget)
+            # an overwrite written when these were controller attributes
+            self.start_widget_pos = 5, 7
+
+    controller = Controller()
+    controller.touch_dx = 3
+    assert controller.touch_dx == 3
+    root, source, target = make_tree(kivy_window, controller)
+    widget = source.children[-1]
+
+    touch = UnitTestTouch(*widget.center)
+    touch.touch_down()
+    session = controller.get_session(touch)
+    assert session.start_widget_pos == (5, 7)
+    assert controller.start_widget_pos == (5, 7)
+    touch.touch_move(touch.ox + 30, touch.oy)
+    EventLoop.idle()
+    assert session.preview_widget.pos == [35, 7]
+
+    controller.touch_dy = 11
+    assert session.touch_dy == 11
+    touch.touch_up()
+    EventLoop.idle()
+
+
+@pytest.mark.parametrize('register', [False, True])
+def test_group_drag(kivy_window, register):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    releases = []
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+    if register:
+        source.drop_controller = target.drop_controller = controller
+
+    def handle_drag_release_multiple(index, drag_widgets):
+        releases.append((index, drag_widgets))
+        type(target).handle_drag_release_multiple(
+            target, index, drag_widgets)
+    target.handle_drag_release_multiple = handle_drag_release_multiple
+
+    first, second, third = source.children[-1:-4:-1]
+    controller.selection = [first, third]
+    x, y = first.center
+    tx, ty = target.children[-1].center
+    drag(first, [(x + 10, y), (x + 30, y), (tx, ty + 5)])
+
+    assert len(releases) == 1
+    assert releases[0][1] == [first, third]
+    assert first.parent is target and third.parent is target
+    assert second.parent is source
+    assert target.children[-2:] == [third, first]
+    assert controller.preview_widget.parent is None
+    assert not controller.sessions
+
+    # dragging a widget outside the selection only drags it
+    x, y = second.center
+    drag(second, [(x + 10, y), (x + 30, y), (tx, ty + 5)])
+    assert len(releases) == 1
+    assert second.parent is target
+
+
+def test_batch_drop(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior, \
+        DraggableObjectBehavior, DraggableController
+
+    layouts = []
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def do_layout(self, *largs):
+            layouts.append(self)
+            super(DraggableBoxLayout, self).do_layout(*largs)
+
+    class DragLabel(DraggableObjectBehavior, Label):
+
+        def initiate_drag(self):
+            self.parent.remove_widget(self)
+
+    controller = DraggableController()
+    root = BoxLayout()
+    source = DraggableBoxLayout(
+        drag_classes=['label'], orientation='vertical', batch_drop=True)
+    target = DraggableBoxLayout(
+        drag_classes=['label'], orientation='vertical', batch_drop=True)
+    root.add_widget(source)
+    root.add_widget(target)
+    for i in range(4):
+        source.add_widget(DragLabel(
+            text=str(i), drag_cls='label', drag_controller=controller))
+        target.add_widget(DragLabel(
+            text='t{}'.format(i), drag_cls='label',
+            drag_controller=controller))
+    kivy_window.add_widget(root)
+    EventLoop.idle()
+
+    widget = source.children[-1]
+    x, y = widget.center
+    tx, ty = target.children[-1].center
+    touch = UnitTestTouch(*widget.center)
+    touch.touch_down()
+    for point in [(x + 10, y), (x + 30, y), (tx, ty + 5)]:
+        touch.touch_move(*point)
+        EventLoop.idle()
+    del layouts[:]
+    touch.touch_up()
+    assert widget.parent is target
+    assert target.children[-1] is widget
+    assert target.spacer_widget.parent is None
+
+    # the dropped widget took the place of the spacer, without a new layout
+    EventLoop.idle()
+    assert target not in layouts
+    positions = [tuple(child.pos) for child in target.children]
+    target.do_layout()
+    assert [tuple(child.pos) for child in target.children] == \
+        pytest.approx(positions)
+
+    # dropping widgets back where they are leaves the children unchanged
+    children = target.children[:]
+    assert not target.apply_drop(1, [children[1]])
+    assert not target.apply_drop(1, [children[2], children[1]])
+    assert target.children == children
+
+    assert target.apply_drop(0, [children[1]])
+    assert target.children == [children[1], children[0]] + children[2:]
+
+
+def make_recycle_tree(window, controller, n=1000, scroll=False, **kwargs):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.recycleview import RecycleView
+    from kivy.uix.recycleboxlayout import RecycleBoxLayout
+    from kivy_garden.drag_n_drop import DraggableRecycleBoxLayoutBehavior, \
+        DraggableObjectBehavior
+
+    class DraggableRecycleBoxLayout(
+            DraggableRecycleBoxLayoutBehavior, RecycleBoxLayout):
+        pass
+
+    class DragLabel(DraggableObjectBehavior, Label):
+        pass
+
+    layout = DraggableRecycleBoxLayout(
+        drag_classes=['label'], orientation='vertical', size_hint_y=None,
+        default_size=(None, 30), default_size_hint=(1, None), **kwargs)
+    layout.bind(minimum_height=layout.setter('height'))
+    rv = RecycleView(do_scroll_x=False, do_scroll_y=scroll)
+    rv.add_widget(layout)
+    rv.viewclass = DragLabel
+    rv.data = [
+        {'text': str(i), 'drag_cls': 'label', 'drag_controller': controller}
+        for i in range(n)]
+    window.add_widget(rv)
+    EventLoop.idle()
+    EventLoop.idle()
+    return rv, layout
+
+
+@pytest.mark.parametrize('register', [False, True])
+def test_recycle_reorder(kivy_window, register):
+    from kivy.base import EventLoop
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    rv, layout = make_recycle_tree(
+        kivy_window, controller,
+        drop_controller=controller if register else None)
+
+    assert len(layout.children) < 100
+    view = next(
+        view for view, i in layout.view_indices.items() if i == 1)
+    x, y = view.to_window(*view.center)
+    opts = layout.view_opts
+    # between the items 4 and 5
+    ty = opts[5]['pos'][1] + 35
+    target_y = layout.to_window(0, ty)[1]
+
+    from kivy.tests.common import UnitTestTouch
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    for point in [(x, y - 10), (x, y - 30), (x, target_y)]:
+        touch.touch_move(*point)
+        EventLoop.idle()
+
+    assert layout._drop_gap_index == 5
+    assert layout.canvas.after.indexof(layout.spacer_widget.canvas) != -1
+    assert layout.spacer_widget.parent is None
+
+    touch.touch_up()
+    EventLoop.idle()
+
+    texts = [item['text'] for item in rv.data]
+    assert texts[:7] == ['0', '2', '3', '4', '1', '5', '6']
+    assert len(texts) == 1000
+    assert layout._drop_gap_index is None
+    assert layout.canvas.after.indexof(layout.spacer_widget.canvas) == -1
+    assert not controller.dragging
+    assert layout.move_data([3], 4) is False
+    assert layout.get_drop_data_index(0, opts[-1]['pos'][1] - 5) == 1000
+    kivy_window.remove_widget(rv)
+
+
+def test_recycle_reorder_scrolled(kivy_window):
+    from time import sleep
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    rv, layout = make_recycle_tree(kivy_window, controller, scroll=True)
+    view = next(
+        view for view, i in layout.view_indices.items() if i == 10)
+    x, y = view.to_window(*view.center)
+
+    # the scroll view only passes the touch down to the view once it's held
+    # still for scroll_timeout and a few frames
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    sleep(rv.scroll_timeout / 1000. * 2)
+    for _ in range(5):
+        EventLoop.idle()
+    assert layout.get_drag_data_index(view) == 10
+    touch.touch_move(x, y - 10)
+    touch.touch_move(x, y - 30)
+    EventLoop.idle()
+    assert controller.dragging
+    assert controller.widget_dragged is view
+
+    # scroll down while dragging, so the dragged view is recycled
+    rv.scroll_y = .5
+    EventLoop.idle()
+    EventLoop.idle()
+    assert layout.view_indices.get(view) != 10
+    assert layout.get_drag_data_index(view) == 10
+
+    indices = sorted(layout.view_indices.values())
+    index = indices[len(indices) // 2]
+    ty = layout.view_opts[index]['pos'][1] + 35
+    target_y = layout.to_window(0, ty)[1]
+    touch.touch_move(x, target_y)
+    EventLoop.idle()
+    assert layout._drop_gap_index == index
+    touch.touch_up()
+    EventLoop.idle()
+
+    texts = [item['text'] for item in rv.data]
+    assert len(texts) == 1000
+    assert texts[index - 1] == '10'
+    assert texts[:10] == [str(i) for i in range(10)]
+    assert texts[10:index - 1] == [str(i) for i in range(11, index)]
+    assert not controller.dragging
+    kivy_window.remove_widget(rv)
+
+
+def test_drag_auto_scroll_coordinates(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.uix.relativelayout import RelativeLayout
+    from kivy.uix.scrollview import ScrollView
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableBoxLayoutBehavior
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+        pass
+
+    assert DraggableBoxLayout().drag_scroll_margin == 0
+
+    # the layout's parent is scrolled and has its own coordinates
+    scroll_view = ScrollView(
+        size_hint=(None, None), size=(300, 300), pos=(100, 100))
+    content = RelativeLayout(size_hint_y=None, height=1000)
+    parent = RelativeLayout(
+        size_hint=(None, None), size=(280, 960), pos=(10, 20))
+    target = DraggableBoxLayout(
+        size_hint=(None, None), size=(280, 960), drag_scroll_margin=40)
+    parent.add_widget(target)
+    content.add_widget(parent)
+    scroll_view.add_widget(content)
+    kivy_window.add_widget(scroll_view)
+    EventLoop.idle()
+    scroll_view.scroll_y = .5
+    EventLoop.idle()
+
+    for pos in [(250, 120), (250, 250), (250, 385)]:
+        x, y = target._window_to_drag_pos(*pos)
+        scrolls = target._update_drag_scroll(x, y)
+        assert target._drag_scroll_pos == pytest.approx(pos)
+        assert scrolls == (pos[1] != 250)
+    target._stop_drag_scroll()
+    kivy_window.remove_widget(scroll_view)
+
+
+@pytest.mark.parametrize('orientation', ['vertical', 'horizontal'])
+def test_drag_auto_scroll(kivy_window, orientation):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.uix.scrollview import ScrollView
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController, \
+        DraggableBoxLayoutBehavior, DraggableObjectBehavior
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            self.add_widget(drag_widget, index)
+
+    class DragLabel(DraggableObjectBehavior, Label):
+
+        def initiate_drag(self):
+            self.parent.remove_widget(self)
+
+    vertical = orientation == 'vertical'
+    controller = DraggableController()
+    root = BoxLayout(orientation='horizontal' if vertical else 'vertical')
+    source = BoxLayout()
+    widget = DragLabel(text='A', drag_cls='label', drag_controller=controller)
+    source.add_widget(widget)
+    scroll_view = ScrollView(do_scroll_x=not vertical, do_scroll_y=vertical)
+    target = DraggableBoxLayout(
+        drag_classes=['label'], orientation=orientation,
+        drag_scroll_margin=40, drag_scroll_speed=1000)
+    if vertical:
+        target.size_hint_y = None
+        target.height = 50 * 40
+    else:
+        target.size_hint_x = None
+        target.width = 50 * 40
+    for i in range(50):
+        target.add_widget(Label(text=str(i)))
+    scroll_view.add_widget(target)
+    root.add_widget(source)
+    root.add_widget(scroll_view)
+    kivy_window.add_widget(root)
+    EventLoop.idle()
+    EventLoop.idle()
+
+    moves = []
+    apply_drag_move = target._apply_drag_move
+
+    def count_moves(x, y):
+        moves.append((x, y))
+        apply_drag_move(x, y)
+    target._apply_drag_move = count_moves
+
+    left, bottom = scroll_view.to_window(*scroll_view.pos)
+    right, top = scroll_view.to_window(scroll_view.right, scroll_view.top)
+    cx, cy = (left + right) / 2., (bottom + top) / 2.
+    # halfway into the margin at the end of the content
+    if vertical:
+        edge = [(cx, bottom + 22), (cx, bottom + 20)]
+        extent = target.height - scroll_view.height
+    else:
+        edge = [(right - 22, cy), (right - 20, cy)]
+        extent = target.width - scroll_view.width
+
+    def scroll():
+        return scroll_view.scroll_y if vertical else scroll_view.scroll_x
+
+    def end():
+        return 0 if vertical else 1
+
+    touch = UnitTestTouch(*widget.center)
+    touch.touch_down()
+    touch.touch_move(widget.center_x + 20, widget.center_y + 20)
+    EventLoop.idle()
+    touch.touch_move(cx, cy)
+    assert moves
+    EventLoop.idle()
+    del moves[:]
+    start = scroll()
+    assert start == 1 - end()
+
+    # moves within the margin only start scrolling, the spacer is moved
+    # by the scroll steps
+    for x, y in edge:
+        touch.touch_move(x, y)
+    assert not moves
+    assert target._drag_scroll_event is not None
+
+    target._drag_scroll_step(.1)
+    assert len(moves) == 1
+    assert abs(abs(scroll() - start) - 500 * .1 / extent) < 1e-6
+
+    EventLoop.idle()
+    EventLoop.idle()
+    assert len(moves) == 3
+    assert scroll() != start
+
+    # it stops at the end of the content, with the spacer at the end
+    target._drag_scroll_step(100)
+    assert scroll() == end()
+    assert target._drag_scroll_step(.1) is False
+    assert target._drag_scroll_event is None
+    EventLoop.idle()
+    assert scroll() == end()
+    assert target.children.index(target.spacer_widget) <= 1
+
+    # and at the other end
+    x, y = (cx, top - 20) if vertical else (left + 20, cy)
+    touch.touch_move(x, y)
+    target._drag_scroll_step(100)
+    assert scroll() == 1 - end()
+    assert target._drag_scroll_step(.1) is False
+
+    touch.touch_move(cx, cy)
+    assert target._drag_scroll_event is None
+    touch.touch_up()
+    EventLoop.idle()
+    assert widget.parent is target
+    kivy_window.remove_widget(root)
+
+
+@pytest.mark.parametrize('work', ['future', 'coroutine', 'error'])
+def test_async_drop(kivy_window, work):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from kivy.base import EventLoop
+    from kivy_garden.drag_n_drop import DraggableController, SpacerWidget
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+    done = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    drops = []
+
+    def save(index):
+        assert done.wait(5)
+        if work == 'error':
+            raise ValueError('not saved')
+        return index
+
+    async def save_async(index):
+        return save(index)
+
+    def handle_drag_release(index, drag_widget):
+        drops.append(index)
+        if work == 'coroutine':
+            return save_async(index)
+        return executor.submit(save, index)
+    target.handle_drag_release = handle_drag_release
+
+    source_children = source.children[:]
+    widget = source.children[-1]
+    x, y = widget.center
+    tx, ty = target.children[-1].center
+    drag(widget, [(x + 10, y), (x + 30, y), (tx, ty + 5)])
+
+    # the drop is pending, the placeholder is in the dropped slot
+    assert drops == [4]
+    assert widget.parent is None
+    placeholder, = target.pending_drops
+    assert isinstance(placeholder, SpacerWidget)
+    assert placeholder is not target.spacer_widget
+    assert target.children[4] is placeholder
+    assert target.spacer_widget.parent is None
+    for _ in range(3):
+        EventLoop.idle()
+    assert target.pending_drops == [placeholder]
+
+    done.set()
+    for _ in range(50):
+        EventLoop.idle()
+        if not target.pending_drops:
+            break
+    executor.shutdown()
+
+    assert not target.pending_drops
+    assert placeholder.parent is None
+    if work == 'error':
+        # the widget is back where it was dragged from
+        assert widget.parent is source
+        assert source.children == source_children
+        assert len(target.children) == 4
+    else:
+        assert widget.parent is target
+        assert target.children[4] is widget
+
+
+def test_rollback_drop_group(kivy_window):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller, n=5)
+    children = source.children[:]
+    dragged = [children[3], children[1]]
+    origins = [(w, source, children.index(w)) for w in dragged]
+    for widget in dragged:
+        source.remove_widget(widget)
+
+    target.rollback_drop(dragged, ValueError('not saved'), origins)
+    assert source.children == children
+
+
+@pytest.mark.parametrize('register', [False, True])
+def test_drag_events(kivy_window, register):
+    from kivy.base import EventLoop
+    from kivy.uix.label import Label
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy_garden.drag_n_drop import DraggableController, \
+        DraggableBoxLayoutBehavior, DraggableObjectBehavior
+
+    class DraggableBoxLayout(DraggableBoxLayoutBehavior, BoxLayout):
+
+        def handle_drag_release(self, index, drag_widget):
+            self.add_widget(drag_widget, index)
+
+    class DragLabel(DraggableObjectBehavior, Label):
+
+        def initiate_drag(self):
+            self.parent.remove_widget(self)
+
+    controller = DraggableController()
+    root = BoxLayout()
+    source = BoxLayout()
+    widget = DragLabel(text='A', drag_cls='label', drag_controller=controller)
+    source.add_widget(widget)
+    root.add_widget(source)
+
+    events = []
+    layouts = []
+    for drag_classes in (['label'], ['other'], ['lab*']):
+        layout = DraggableBoxLayout(
+            drag_classes=drag_classes,
+            drop_controller=controller if register else None)
+        layout.add_widget(Label(text='t'))
+        for name in (
+                'on_drag_start', 'on_drag_enter', 'on_drag_leave',
+                'on_drag_end'):
+            layout.fbind(
+                name, lambda layout, drag_widget, name=name: events.append(
+                    (layouts.index(layout), name[8:], drag_widget)))
+        layouts.append(layout)
+        root.add_widget(layout)
+    kivy_window.add_widget(root)
+    EventLoop.idle()
+
+    x, y = widget.center
+    points = [(x + 10, y), (x + 30, y), layouts[0].center,
+              layouts[1].center, layouts[2].center]
+    drag(widget, points)
+
+    # the order among the notified layouts is unspecified
+    n = 2 if register else 0
+    assert sorted(events[:n], key=str) == \
+        [(0, 'start', widget), (2, 'start', widget)][:n]
+    assert sorted(events[len(events) - n:], key=str) == \
+        [(0, 'end', widget), (2, 'end', widget)][:n]
+    assert events[n:len(events) - n] == [
+        (0, 'enter', widget), (0, 'leave', widget),
+        (2, 'enter', widget), (2, 'leave', widget)]
+    assert widget.parent is layouts[2]
+
+
+@pytest.mark.parametrize('hysteresis', [0, 10])
+def test_drag_hysteresis(kivy_window, hysteresis):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    # the items don't move with the spacer, so the boundary between two drop
+    # positions stays at the middle of the item
+    rv, layout = make_recycle_tree(
+        kivy_window, controller, n=100, drag_hysteresis=hysteresis)
+    opts = layout.view_opts
+    mid = opts[3]['pos'][1] + 15
+    view = next(
+        view for view, i in layout.view_indices.items() if i == 1)
+    x, y = view.to_window(*view.center)
+
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    touch.touch_move(x, y - 30)
+    EventLoop.idle()
+    touch.touch_move(x, layout.to_window(0, mid + 2)[1])
+    EventLoop.idle()
+    count = layout.spacer_move_count
+    assert layout._drop_gap_index == 3
+
+    # jitter around the middle of the item, where before flips to after
+    for i in range(10):
+        touch.touch_move(x, layout.to_window(0, mid + (-2 if i % 2 else 2))[1])
+        EventLoop.idle()
+    moves = layout.spacer_move_count - count
+    if hysteresis:
+        assert not moves
+        assert layout._drop_gap_index == 3
+    else:
+        assert moves == 9
+
+    # moving further than the hysteresis still moves the spacer
+    touch.touch_move(x, layout.to_window(0, opts[6]['pos'][1] + 10)[1])
+    EventLoop.idle()
+    assert layout.spacer_move_count == count + moves + 1
+    assert layout._drop_gap_index == 7
+    touch.touch_up()
+    EventLoop.idle()
+    assert [item['text'] for item in rv.data][:7] == \
+        ['0', '2', '3', '4', '5', '6', '1']
+    kivy_window.remove_widget(rv)
+
+
+def test_drop_in_drag_dead_zone(kivy_window):
+    from kivy.base import EventLoop
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    rv, layout = make_recycle_tree(
+        kivy_window, controller, n=100, drag_hysteresis=10)
+    mid = layout.view_opts[3]['pos'][1] + 15
+    view = next(
+        view for view, i in layout.view_indices.items() if i == 1)
+    x, y = view.to_window(*view.center)
+
+    touch = UnitTestTouch(x, y)
+    touch.touch_down()
+    touch.touch_move(x, y - 30)
+    EventLoop.idle()
+    touch.touch_move(x, layout.to_window(0, mid + 2)[1])
+    EventLoop.idle()
+    assert layout._drop_gap_index == 3
+
+    # released just across the middle of the item, it's dropped at the gap
+    touch.touch_move(x, layout.to_window(0, mid - 1)[1])
+    EventLoop.idle()
+    assert layout._drop_gap_index == 3
+    touch.touch_up()
+    EventLoop.idle()
+    assert [item['text'] for item in rv.data][:5] == \
+        ['0', '2', '1', '3', '4']
+    kivy_window.remove_widget(rv)
+
+
+def test_drop_in_drag_dead_zone_box(kivy_window):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+    target.drag_hysteresis = 40
+    spacer = target.spacer_widget
+    x, y = target.children[1].center
+    target._move_drag_spacer(x, y + 10)
+    assert spacer.parent is target
+    index = target.children.index(spacer)
+
+    # anywhere in the dead zone drops where the spacer is shown, even over
+    # another widget
+    for dy in range(-29, 50, 3):
+        assert target.get_drop_insertion_index_up(
+            x, y + dy, remove_spacer=False) == index
+    assert target.get_drop_insertion_index_up(x, y + 10) == index
+    assert spacer.parent is None
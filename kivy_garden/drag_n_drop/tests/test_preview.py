@@ -0,0 +1,267 @@
+import pytest
+
+
+def make_widget(pos=(7, 9), size=(50, 30)):
+    from kivy.uix.widget import Widget
+    from kivy.graphics import Color, Rectangle
+
+    x, y = pos
+    w, h = size
+    widget = Widget(size=size, pos=pos)
+    with widget.canvas:
+        # top half red, bottom half blue
+        Color(1, 0, 0, 1)
+        Rectangle(pos=(x, y + h / 2), size=(w, h / 2))
+        Color(0, 0, 1, 1)
+        Rectangle(pos=(x, y), size=(w, h / 2))
+    return widget
+
+
+def read_preview(controller):
+    from kivy.graphics import Color, Rectangle, Fbo, ClearBuffers, \
+        ClearColor
+
+    w, h = map(int, controller.preview_widget.size)
+    fbo = Fbo(size=(w, h))
+    with fbo:
+        ClearColor(0, 1, 0, 1)
+        ClearBuffers()
+        Color(1, 1, 1, 1)
+        Rectangle(
+            pos=(0, 0), size=(w, h),
+            texture=controller.preview_widget.preview_texture)
+    fbo.draw()
+    pixels = fbo.pixels
+
+    def pixel(x, y):
+        i = (y * w + x) * 4
+        return list(pixels[i:i + 4])
+    return pixel(w // 2, 2), pixel(w // 2, h - 3)
+
+
+@pytest.mark.parametrize('mode', ['pixels', 'texture'])
+def test_preview_orientation(kivy_window, mode):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_mode=mode)
+    controller.prepare_preview_widget(make_widget())
+    assert list(controller.preview_widget.size) == [50, 30]
+    if mode == 'pixels':
+        assert controller.preview_pixels
+    else:
+        assert controller.preview_pixels is None
+
+    bottom, top = read_preview(controller)
+    assert bottom == [0, 0, 255, 255]
+    assert top == [255, 0, 0, 255]
+    controller.clean_dragging()
+
+
+def test_texture_preview_reload(kivy_window):
+    from kivy.graphics import Color
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_mode='texture')
+    widget = make_widget()
+    controller.prepare_preview_widget(widget)
+    assert controller.preview_pool.total_bytes == 4 * 64 * 64
+
+    for instruction in widget.canvas.children:
+        if isinstance(instruction, Color):
+            instruction.rgba = 0, 1, 0, 1
+
+    # on a context reload, the preview is rendered again from the widget
+    buffer = controller._get_default_session()._preview_buffer
+    buffer.reload_fbo(buffer.fbo)
+    assert read_preview(controller) == ([0, 255, 0, 255], [0, 255, 0, 255])
+    controller.clean_dragging()
+
+
+def test_preview_pool_reuse(kivy_window):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    pool = controller.preview_pool
+
+    for size in [(50, 30), (60, 20), (50, 30), (100, 30)]:
+        controller.prepare_preview_widget(make_widget(size=size))
+        controller.clean_dragging()
+
+    # the first three share the 64x64 bucket
+    assert pool.misses == 2
+    assert pool.hits == 2
+    assert pool.total_bytes == 2 * 4 * (64 * 64 + 128 * 64)
+
+
+def test_preview_pool_lru_eviction(kivy_window):
+    from kivy_garden.drag_n_drop import PreviewTexturePool
+
+    pool = PreviewTexturePool(max_bytes=4 * 2 * 4 * 64 * 64, bucket_size=64)
+    a = pool.acquire((10, 10))
+    b = pool.acquire((10, 70))
+    pool.release(a)
+    pool.release(b)
+    assert not pool.evictions
+
+    pool.acquire((70, 10))
+    assert pool.evictions == 1
+    # a was least recently used, so it was evicted and b can be reused
+    assert pool.acquire((10, 70)) is b
+    assert pool.acquire((10, 10)) is not a
+    assert pool.misses == 4
+    assert pool.hits == 1
+
+
+def test_preview_cache(kivy_window):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_cache=True)
+    pool = controller.preview_pool
+    widget = make_widget()
+    other = make_widget()
+
+    controller.prepare_preview_widget(widget)
+    controller.clean_dragging()
+    controller.prepare_preview_widget(widget)
+    assert read_preview(controller)[1] == [255, 0, 0, 255]
+    controller.clean_dragging()
+    assert controller.preview_cache_hits == 1
+    assert pool.misses == 1 and not pool.hits
+
+    # a size change or an explicit invalidation renders it again
+    widget.width = 40
+    controller.prepare_preview_widget(widget)
+    controller.clean_dragging()
+    controller.invalidate_preview(widget)
+    controller.prepare_preview_widget(widget)
+    controller.clean_dragging()
+    assert controller.preview_cache_hits == 1
+    assert pool.misses == 1 and pool.hits == 2
+
+    # the budget only fits one preview
+    controller.preview_cache_max_bytes = 3 * 4 * 64 * 64
+    controller.prepare_preview_widget(other)
+    controller.clean_dragging()
+    controller.prepare_preview_widget(widget)
+    controller.clean_dragging()
+    assert controller.preview_cache_hits == 1
+
+    controller.preview_cache = False
+    assert not controller._preview_cache
+    assert not controller._preview_cache_bytes
+
+
+@pytest.mark.parametrize('props', [
+    {'preview_scale': .5}, {'preview_max_pixels': 400}])
+def test_preview_scale(kivy_window, props):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_pool_bucket_size=1, **props)
+    controller.prepare_preview_widget(make_widget(size=(40, 40)))
+    buffer = controller._get_default_session()._preview_buffer
+
+    # rendered at 20x20, but still shown at the widget's size
+    assert buffer.size == (20, 20)
+    assert list(controller.preview_widget.size) == [40, 40]
+    assert controller.preview_widget.preview_texture.size == (20, 20)
+    assert read_preview(controller) == ([0, 0, 255, 255], [255, 0, 0, 255])
+    controller.clean_dragging()
+
+
+def test_lazy_preview_widget(kivy_window):
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController()
+    assert controller._preview_widget is None
+    assert not controller._preview_widgets
+
+    controller.prepare_preview_widget(make_widget())
+    widget = controller.preview_widget
+    assert widget is controller._get_default_session().preview_widget
+    controller.clean_dragging()
+    assert controller.preview_widget is widget
+
+
+@pytest.mark.parametrize('mode', ['pixels', 'texture'])
+def test_group_preview(kivy_window, mode):
+    from kivy.graphics import Color, Rectangle
+    from kivy.uix.widget import Widget
+    from kivy_garden.drag_n_drop import DraggableController, DragSession
+
+    root = Widget()
+    widgets = []
+    for y, color in ((20, (0, 0, 1, 1)), (60, (1, 0, 0, 1))):
+        widget = Widget(pos=(30, y), size=(50, 40))
+        with widget.canvas:
+            Color(*color)
+            Rectangle(pos=widget.pos, size=widget.size)
+        root.add_widget(widget)
+        widgets.append(widget)
+    kivy_window.add_widget(root)
+
+    controller = DraggableController(preview_mode=mode)
+    assert controller.get_group_rect(widgets) == (30, 20, 80, 100)
+    session = DragSession(None, widgets[0], widgets)
+    controller.prepare_preview_widget(widgets[0], session)
+    assert controller.preview_widget is session.preview_widget
+    assert list(controller.preview_widget.size) == [50, 80]
+    assert controller.preview_pool.misses == 1
+
+    bottom, top = read_preview(controller)
+    assert bottom == [0, 0, 255, 255]
+    assert top == [255, 0, 0, 255]
+    assert root.canvas.indexof(widgets[0].canvas) != -1
+    assert root.canvas.indexof(widgets[1].canvas) != -1
+    controller.clean_dragging(session)
+
+
+def test_live_preview(kivy_window):
+    from kivy.uix.widget import Widget
+    from kivy.graphics import Fbo, ClearBuffers, ClearColor
+    from kivy_garden.drag_n_drop import DraggableController
+
+    controller = DraggableController(preview_mode='live')
+    parent = Widget()
+    widget = make_widget()
+    parent.add_widget(widget)
+    color = widget.canvas.children[0]
+    controller.prepare_preview_widget(widget)
+    preview = controller.preview_widget
+
+    assert preview.preview_texture is None
+    assert preview.live_widgets == [widget]
+    assert controller.preview_pixels is None
+    assert controller.preview_pool.misses == 0
+    assert parent.canvas.indexof(widget.canvas) != -1
+
+    preview.pos = 100, 200
+    fbo = Fbo(size=(200, 300))
+    with fbo:
+        ClearColor(0, 1, 0, 1)
+        ClearBuffers()
+    fbo.add(preview.canvas)
+
+    def read():
+        fbo.draw()
+        pixels = fbo.pixels
+
+        def pixel(x, y):
+            i = (y * 200 + x) * 4
+            return list(pixels[i:i + 4])
+        return pixel(125, 202), pixel(125, 227), pixel(90, 202)
+
+    bottom, top, outside = read()
+    assert bottom == [0, 0, 255, 255]
+    assert top == [255, 0, 0, 255]
+    assert outside == [0, 255, 0, 255]
+
+    # the preview draws the widget's current instructions. In the app, the
+    # change redraws the window, here the fbo has to be redrawn explicitly
+    color.rgba = 1, 1, 1, 1
+    fbo.ask_update()
+    assert read()[1] == [255, 255, 255, 255]
+
+    fbo.remove(preview.canvas)
+    controller.clean_dragging()
+    assert preview.live_widgets == []
+    assert parent.canvas.indexof(widget.canvas) != -1
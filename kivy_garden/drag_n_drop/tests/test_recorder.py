@@ -0,0 +1,42 @@
+import pytest
+
+
+@pytest.mark.parametrize('realtime', [False, True])
+def test_record_replay(kivy_window, tmp_path, realtime):
+    from kivy.tests.common import UnitTestTouch
+    from kivy_garden.drag_n_drop import DraggableController
+    from kivy_garden.drag_n_drop.recorder import DragRecorder, DragReplayer
+    from kivy_garden.drag_n_drop.tests.test_drag import make_tree, drag
+
+    controller = DraggableController()
+    root, source, target = make_tree(kivy_window, controller)
+    recorder = DragRecorder(controller=controller)
+    recorder.start()
+
+    # clicks are not recorded
+    touch = UnitTestTouch(*source.children[0].center)
+    touch.touch_down()
+    touch.touch_up()
+
+    widget = source.children[-1]
+    x, y = widget.center
+    tx, ty = target.children[-1].center
+    drag(widget, [(x + 10, y), (x + 30, y), (tx, ty + 5)])
+    recorder.stop()
+    assert widget.parent is target
+
+    assert [event[1] for event in recorder.events] == [0, 1, 1, 1, 2]
+    assert len({event[2] for event in recorder.events}) == 1
+    filename = str(tmp_path / 'drags.json')
+    recorder.save(filename)
+
+    kivy_window.remove_widget(root)
+    root, source, target = make_tree(kivy_window, controller)
+    widget = source.children[-1]
+    replayer = DragReplayer.load(filename)
+    assert replayer.window_size == list(kivy_window.size)
+    replayer.run(realtime=realtime)
+
+    assert widget.parent is target
+    assert target.children[-1] is widget
+    assert not controller.dragging